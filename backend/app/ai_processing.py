@@ -4,13 +4,27 @@ import httpx
 import re
 import configparser
 from sqlalchemy.orm import sessionmaker
-from faster_whisper import WhisperModel
-from pydub import AudioSegment
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+import numpy as np
 import chromadb
 import asyncio
+import bisect
+import math
+import time
+import datetime
+from .audio import SAMPLE_RATE, PCMDecoder, PCMSpool, SpeechChunker, SpoolSlice, probe_duration
+from .autotune import WhisperAutotuner
+from .cache import DiskCache, LLMResponseCache, hash_file
+from .events import InsightBroadcaster
+from .jsonstream import StreamingJSONObject
+from .ollama import OllamaClient
+from .fingerprint import DEFAULT_MAX_BIT_ERROR_RATE, AudioFingerprinter, bit_error_rate
+from .diarization import SpeakerDiarizer, label_segments, labelled_transcript
 from .crud import meeting_crud
-from concurrent.futures import ThreadPoolExecutor
-import io
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+from collections import OrderedDict, deque
+import multiprocessing
+import threading
 
 class AIServiceConfig:
     """Loads all AI-related configuration from environment variables."""
@@ -25,79 +39,854 @@ class AIServiceConfig:
         self.ollama_embed_url = config.get("AI", "OLLAMA_EMBED_URL", fallback=None)
         self.ollama_llm_model = config.get("AI", "OLLAMA_LLM_MODEL", fallback=None)
         self.ollama_embed_model = config.get("AI", "OLLAMA_EMBED_MODEL", fallback=None)
+        self.ollama_num_ctx = config.getint("AI", "OLLAMA_NUM_CTX", fallback=8192)
+        self.ollama_max_connections = config.getint("AI", "OLLAMA_MAX_CONNECTIONS", fallback=8)
+        self.ollama_keepalive_seconds = config.getfloat("AI", "OLLAMA_KEEPALIVE_SECONDS", fallback=60)
+        self.ollama_connect_timeout = config.getfloat("AI", "OLLAMA_CONNECT_TIMEOUT", fallback=5)
+        self.ollama_read_timeout = config.getfloat("AI", "OLLAMA_READ_TIMEOUT", fallback=600)
+        self.insight_section_tokens = config.getint("AI", "INSIGHT_SECTION_TOKENS", fallback=5000)
+        self.insight_parallel_requests = config.getint("AI", "INSIGHT_PARALLEL_REQUESTS", fallback=4)
+        self.whisper_compute_type = config.get("AI", "WHISPER_COMPUTE_TYPE", fallback="int8")
+        self.whisper_cpu_threads = config.getint("AI", "WHISPER_CPU_THREADS", fallback=0)
+        self.whisper_autotune = config.getboolean("AI", "WHISPER_AUTOTUNE", fallback=False)
+        self.whisper_autotune_compute_types = [
+            name.strip() for name in
+            config.get("AI", "WHISPER_AUTOTUNE_COMPUTE_TYPES", fallback="int8,int8_float32,float32").split(",")
+            if name.strip()
+        ]
+        self.whisper_autotune_clip = config.get("AI", "WHISPER_AUTOTUNE_CLIP", fallback="") or None
+        self.whisper_autotune_cache_dir = config.get("AI", "WHISPER_AUTOTUNE_CACHE_DIR", fallback="cache/autotune")
+        self.transcription_executor = config.get("AI", "TRANSCRIPTION_EXECUTOR", fallback="thread")
+        # Capped at the core count, so every concurrent decode keeps at least one core of its own.
+        self.transcription_workers = min(config.getint("AI", "TRANSCRIPTION_WORKERS", fallback=8), os.cpu_count() or 1)
+        self.vad_max_chunk_seconds = config.getfloat("AI", "VAD_MAX_CHUNK_SECONDS", fallback=30)
+        self.vad_min_silence_ms = config.getint("AI", "VAD_MIN_SILENCE_MS", fallback=500)
+        self.straggler_deadline_factor = config.getfloat("AI", "STRAGGLER_DEADLINE_FACTOR", fallback=4.0)
+        self.straggler_min_deadline_seconds = config.getfloat("AI", "STRAGGLER_MIN_DEADLINE_SECONDS", fallback=15)
+        self.min_chunk_seconds = config.getfloat("AI", "MIN_CHUNK_SECONDS", fallback=5)
+        self.chunk_overlap_seconds = config.getfloat("AI", "CHUNK_OVERLAP_SECONDS", fallback=1.0)
+        self.whisper_batch_size = config.getint("AI", "WHISPER_BATCH_SIZE", fallback=1)
+        self.whisper_word_timestamps = config.getboolean("AI", "WHISPER_WORD_TIMESTAMPS", fallback=False)
+        self.whisper_models = [
+            name.strip() for name in config.get("AI", "WHISPER_MODELS", fallback="").split(",") if name.strip()
+        ] or [self.whisper_model_path]
+        self.whisper_preview_model = config.get("AI", "WHISPER_PREVIEW_MODEL", fallback="tiny.en")
+        if self.whisper_preview_model not in self.whisper_models:
+            self.whisper_models.append(self.whisper_preview_model)
+        self.whisper_max_resident_models = config.getint("AI", "WHISPER_MAX_RESIDENT_MODELS", fallback=2)
+        self.diarization_enabled = config.getboolean("AI", "DIARIZATION_ENABLED", fallback=False)
+        self.diarization_threshold = config.getfloat("AI", "DIARIZATION_THRESHOLD", fallback=0.5)
+        self.diarization_max_speakers = config.getint("AI", "DIARIZATION_MAX_SPEAKERS", fallback=8)
+        self.diarization_label_prompt = config.getboolean("AI", "DIARIZATION_LABEL_PROMPT", fallback=True)
+        self.fingerprint_enabled = config.getboolean("AI", "FINGERPRINT_ENABLED", fallback=False)
+        self.fingerprint_seconds = config.getfloat("AI", "FINGERPRINT_SECONDS", fallback=120)
+        self.fingerprint_max_bit_error_rate = config.getfloat(
+            "AI", "FINGERPRINT_MAX_BIT_ERROR_RATE", fallback=DEFAULT_MAX_BIT_ERROR_RATE
+        )
+        self.pcm_spool_enabled = config.getboolean("AI", "PCM_SPOOL_ENABLED", fallback=True)
+        self.pcm_spool_dir = config.get("AI", "PCM_SPOOL_DIR", fallback="cache/pcm")
+        self.llm_cache_dir = config.get("AI", "LLM_CACHE_DIR", fallback="cache/llm")
+        self.llm_cache_max_mb = config.getint("AI", "LLM_CACHE_MAX_MB", fallback=256)
+        self.llm_cache_ttl_hours = config.getfloat("AI", "LLM_CACHE_TTL_HOURS", fallback=168)
+        self.transcript_cache_dir = config.get("AI", "TRANSCRIPT_CACHE_DIR", fallback="cache/transcripts")
+        self.transcript_cache_max_mb = config.getint("AI", "TRANSCRIPT_CACHE_MAX_MB", fallback=512)
+        self.unfinished_upload_retention_days = config.getfloat("AI", "UNFINISHED_UPLOAD_RETENTION_DAYS", fallback=7)
         self.validate()
 
+    def create_llm_cache(self) -> LLMResponseCache:
+        return LLMResponseCache(self.llm_cache_dir, max_bytes=self.llm_cache_max_mb * 1024 * 1024,
+                                ttl_seconds=self.llm_cache_ttl_hours * 3600 or None)
+
+    def create_ollama_client(self) -> OllamaClient:
+        return OllamaClient(
+            max_connections=self.ollama_max_connections, keepalive_seconds=self.ollama_keepalive_seconds,
+            connect_timeout=self.ollama_connect_timeout, read_timeout=self.ollama_read_timeout,
+        )
+
     def validate(self):
         # Updated validation check
         if not all([self.ollama_api_url, self.ollama_embed_url, self.ollama_llm_model, self.ollama_embed_model]):
             raise ValueError("One or more AI service environment variables are not set.")
+        if self.insight_section_tokens < 1 or self.insight_parallel_requests < 1:
+            raise ValueError("INSIGHT_SECTION_TOKENS and INSIGHT_PARALLEL_REQUESTS must be at least 1.")
+        if self.insight_section_tokens >= self.ollama_num_ctx:
+            raise ValueError("INSIGHT_SECTION_TOKENS must leave room for the prompt and answer within OLLAMA_NUM_CTX.")
+        if self.transcription_executor not in ("thread", "process"):
+            raise ValueError("TRANSCRIPTION_EXECUTOR must be either 'thread' or 'process'.")
+        if self.whisper_autotune and not self.whisper_autotune_compute_types:
+            raise ValueError("WHISPER_AUTOTUNE_COMPUTE_TYPES must list at least one compute type.")
+        if self.transcription_workers < 1:
+            raise ValueError("TRANSCRIPTION_WORKERS must be at least 1.")
+        if self.vad_max_chunk_seconds <= 0:
+            raise ValueError("VAD_MAX_CHUNK_SECONDS must be positive.")
+        if self.whisper_model_path not in self.whisper_models:
+            raise ValueError("WHISPER_MODEL_PATH must be one of WHISPER_MODELS.")
+        if self.whisper_max_resident_models < 1:
+            raise ValueError("WHISPER_MAX_RESIDENT_MODELS must be at least 1.")
+        if not 0 < self.min_chunk_seconds <= self.vad_max_chunk_seconds:
+            raise ValueError("MIN_CHUNK_SECONDS must be positive and no larger than VAD_MAX_CHUNK_SECONDS.")
+        if not 0 <= self.chunk_overlap_seconds < self.vad_max_chunk_seconds / 2:
+            raise ValueError("CHUNK_OVERLAP_SECONDS must be between 0 and half of VAD_MAX_CHUNK_SECONDS.")
+        if self.whisper_batch_size < 1:
+            raise ValueError("WHISPER_BATCH_SIZE must be at least 1.")
+        if not 0 < self.diarization_threshold < 2 or self.diarization_max_speakers < 1:
+            raise ValueError("DIARIZATION_THRESHOLD must be between 0 and 2 and DIARIZATION_MAX_SPEAKERS at least 1.")
+        if self.straggler_deadline_factor < 0 or self.straggler_min_deadline_seconds < 0:
+            raise ValueError("STRAGGLER_DEADLINE_FACTOR and STRAGGLER_MIN_DEADLINE_SECONDS must not be negative.")
+
+# --- Chunk decoding ---
+# Shared by the thread backend and the process-pool workers.
+# Batched decoding packs audio into windows of at most 30 s, Whisper's input length.
+BATCH_WINDOW_SAMPLES = 30 * SAMPLE_RATE
+
+def _segment_record(segment, shift: float = 0.0) -> dict:
+    """Plain, picklable form of a Whisper segment with times relative to its chunk."""
+    record = {"start": segment.start - shift, "end": segment.end - shift, "text": segment.text.strip()}
+    if segment.words:
+        record["words"] = [[word.start - shift, word.end - shift, word.word.strip()] for word in segment.words]
+    return record
+
+def _pcm(chunk: np.ndarray | SpoolSlice) -> np.ndarray:
+    """Chunks may arrive as arrays or as ranges of a PCM spool file, which are mapped here."""
+    return chunk.load() if isinstance(chunk, SpoolSlice) else chunk
+
+def _decode_chunk(whisper: WhisperModel, chunk: np.ndarray | SpoolSlice, options: dict) -> list[dict]:
+    segments, _ = whisper.transcribe(_pcm(chunk), **options)
+    return [_segment_record(segment) for segment in segments]
+
+def _decode_batch(pipeline: BatchedInferencePipeline, chunks: list[np.ndarray], batch_size: int,
+                  options: dict) -> list[list[dict]]:
+    """
+    Decodes several chunks in one batched pass. The chunks are laid end to end and
+    each one is passed as its own clip, so the encoder and decoder run over up to
+    `batch_size` of them together. Segments are mapped back to chunks by start time.
+    """
+    starts, clips, position = [], [], 0
+    for chunk in chunks:
+        starts.append(position)
+        for start in range(position, position + len(chunk), BATCH_WINDOW_SAMPLES):
+            clips.append({"start": start, "end": min(start + BATCH_WINDOW_SAMPLES, position + len(chunk))})
+        position += len(chunk)
+
+    audio = np.concatenate([_pcm(chunk) for chunk in chunks])
+    segments, _ = pipeline.transcribe(audio, clip_timestamps=clips, vad_filter=False, batch_size=batch_size, **options)
+
+    results = [[] for _ in chunks]
+    for segment in segments:
+        index = max(bisect.bisect_right(starts, int(segment.start * SAMPLE_RATE)) - 1, 0)
+        results[index].append(_segment_record(segment, shift=starts[index] / SAMPLE_RATE))
+    return results
+
+def _absolute_segments(chunk: dict) -> list[dict]:
+    offset = chunk["offset"]
+    segments = []
+    for segment in chunk["segments"]:
+        absolute = {"start": offset + segment["start"], "end": offset + segment["end"], "text": segment["text"]}
+        if segment.get("words"):
+            absolute["words"] = [[offset + start, offset + end, word] for start, end, word in segment["words"]]
+        segments.append(absolute)
+    return segments
+
+def _trim_segments(segments: list[dict], boundary: float, keep_before: bool) -> list[dict]:
+    """
+    Keeps only the part of `segments` before (or from) `boundary`. Words are placed
+    by their midpoint; segments without word timings are kept or dropped whole.
+    """
+    kept = []
+    for segment in segments:
+        words = segment.get("words")
+        if words:
+            words = [word for word in words if ((word[0] + word[1]) / 2 < boundary) == keep_before]
+            if not words:
+                continue
+            segment = {"start": words[0][0], "end": words[-1][1],
+                       "text": " ".join(word[2] for word in words), "words": words}
+        elif ((segment["start"] + segment["end"]) / 2 < boundary) != keep_before:
+            continue
+        kept.append(segment)
+    return kept
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+def _drop_repeated_words(previous: list[dict], following: list[dict], max_words: int = 4):
+    """
+    Removes words at the start of `following` that repeat the last words of
+    `previous`, which happens when both chunks decoded a word near the cut.
+    """
+    if not previous or not following:
+        return
+    tail = [_normalize_word(word) for word in previous[-1]["text"].split()]
+    first = following[0]
+    head = [_normalize_word(word) for word in first["text"].split()]
+    for k in range(min(max_words, len(tail), len(head)), 0, -1):
+        if tail[-k:] == head[:k]:
+            first["text"] = " ".join(first["text"].split()[k:])
+            if first.get("words"):
+                first["words"] = first["words"][k:]
+                if first["words"]:
+                    first["start"] = first["words"][0][0]
+            if not first["text"]:
+                following.pop(0)
+            return
+
+def _detect_language(whisper: WhisperModel, audio: np.ndarray) -> tuple[str, float]:
+    """Detects the language of `audio`, voting over each of its 30 s windows."""
+    windows = max(1, math.ceil(len(audio) / BATCH_WINDOW_SAMPLES))
+    language, probability, _ = whisper.detect_language(audio, language_detection_segments=windows)
+    return language, probability
+
+def _decode_pieces(whisper: WhisperModel, pieces: list[tuple[float, np.ndarray]], options: dict) -> list[dict]:
+    """Decodes `(shift_seconds, audio)` pieces in turn and returns their segments on one chunk timeline."""
+    segments = []
+    for shift, piece in pieces:
+        for segment in _decode_chunk(whisper, piece, options):
+            segment["start"] += shift
+            segment["end"] += shift
+            for word in segment.get("words", []):
+                word[0] += shift
+                word[1] += shift
+            segments.append(segment)
+    return segments
+
+def _assemble_transcript(completed: dict[int, dict]) -> dict:
+    """
+    Joins per-chunk results (`{"offset", "duration", "segments"}` keyed by chunk
+    index) into the full transcript plus a columnar segment table with absolute
+    timestamps. Where two chunks overlap, each keeps the words on its side of the
+    middle of the overlap and any word decoded by both is dropped once.
+    """
+    stitched, previous_chunk = [], None
+    for index in sorted(completed):
+        chunk = completed[index]
+        segments = _absolute_segments(chunk)
+        if previous_chunk is not None:
+            previous_end = previous_chunk["offset"] + previous_chunk["duration"]
+            if chunk["offset"] < previous_end:
+                boundary = (chunk["offset"] + previous_end) / 2
+                while stitched and stitched[-1]["start"] >= boundary:
+                    stitched.pop()
+                if stitched:
+                    stitched[-1:] = _trim_segments(stitched[-1:], boundary, keep_before=True)
+                segments = _trim_segments(segments, boundary, keep_before=False)
+                _drop_repeated_words(stitched, segments)
+        stitched.extend(segments)
+        previous_chunk = chunk
+
+    columns = {"start": [], "end": [], "text": []}
+    words = {"start": [], "end": [], "word": [], "segment": []}
+    for segment in stitched:
+        for start, end, word in segment.get("words", []):
+            words["start"].append(round(start, 2))
+            words["end"].append(round(end, 2))
+            words["word"].append(word)
+            words["segment"].append(len(columns["text"]))
+        columns["start"].append(round(segment["start"], 2))
+        columns["end"].append(round(segment["end"], 2))
+        columns["text"].append(segment["text"])
+    if words["word"]:
+        columns["words"] = words
+    return {"transcript": " ".join(columns["text"]), "segments": columns}
+
+class WhisperModelRegistry:
+    """
+    Loads Whisper models by name on first use and keeps at most `max_resident` of
+    them in memory, evicting the least recently used. A model that is evicted while
+    a chunk is still decoding is freed once that chunk finishes.
+    """
+
+    def __init__(self, compute_type: str, cpu_threads: int, num_workers: int, max_resident: int):
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.num_workers = num_workers
+        self.max_resident = max_resident
+        self._models: OrderedDict[str, tuple[WhisperModel, BatchedInferencePipeline]] = OrderedDict()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> tuple[WhisperModel, BatchedInferencePipeline]:
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                return self._models[name]
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Only one thread loads a given model; others wait for it instead of loading a copy.
+        with load_lock:
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    return self._models[name]
+            print(f"Loading Whisper model: {name}")
+            model = WhisperModel(name, device="cpu", compute_type=self.compute_type,
+                                 cpu_threads=self.cpu_threads, num_workers=self.num_workers)
+            entry = (model, BatchedInferencePipeline(model=model))
+            with self._lock:
+                self._models[name] = entry
+                while len(self._models) > self.max_resident:
+                    evicted, _ = self._models.popitem(last=False)
+                    print(f"Evicting Whisper model: {evicted}")
+            return entry
+
+    def get(self, name: str) -> WhisperModel:
+        return self._entry(name)[0]
+
+    def get_batched(self, name: str) -> BatchedInferencePipeline:
+        return self._entry(name)[1]
+
+    @property
+    def resident(self) -> list[str]:
+        with self._lock:
+            return list(self._models)
+
+# --- Process-pool worker state ---
+# Each worker process keeps its own registry, so every worker loads the CTranslate2
+# models it is asked for once and reuses them; no model is shared across processes.
+# With the PCM spool enabled, chunks reach workers as SpoolSlices: only a path and a
+# sample range are pickled, and the worker maps the audio straight from the file.
+_worker_models = None
+
+def _init_transcription_worker(compute_type: str, cpu_threads: int, max_resident: int):
+    global _worker_models
+    _worker_models = WhisperModelRegistry(compute_type, cpu_threads, num_workers=1, max_resident=max_resident)
+
+def _transcribe_in_worker(model: str, chunk: np.ndarray, options: dict) -> list[dict]:
+    return _decode_chunk(_worker_models.get(model), chunk, options)
+
+def _transcribe_pieces_in_worker(model: str, pieces: list[tuple[float, np.ndarray]], options: dict) -> list[dict]:
+    return _decode_pieces(_worker_models.get(model), pieces, options)
+
+def _detect_language_in_worker(model: str, audio: np.ndarray) -> tuple[str, float]:
+    return _detect_language(_worker_models.get(model), audio)
+
+def _transcribe_batch_in_worker(model: str, chunks: list[np.ndarray], batch_size: int,
+                                options: dict) -> list[list[dict]]:
+    return _decode_batch(_worker_models.get_batched(model), chunks, batch_size, options)
+
+class TranscriptionScheduler:
+    """
+    One long-lived queue of chunk jobs shared by every meeting. Chunks are handed
+    to the executor round-robin across meetings and never more than
+    `max_in_flight` at a time, so concurrent uploads share the same cores fairly.
+    """
+
+    def __init__(self, executor: Executor, max_in_flight: int):
+        self.executor = executor
+        self.max_in_flight = max_in_flight
+        self._queues: OrderedDict[str, deque] = OrderedDict()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="transcription-scheduler", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, job_id: str, fn, *args) -> Future:
+        """
+        Queues `fn(*args)` under `job_id` and returns a future for its result. Once
+        done, the future's `run_seconds` holds how long the item ran on a worker.
+        """
+        future = Future()
+        with self._cond:
+            self._queues.setdefault(job_id, deque()).append((future, fn, args))
+            self._cond.notify()
+        return future
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queue_depth": sum(len(queue) for queue in self._queues.values()),
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "active_jobs": len(self._queues),
+            }
+
+    def _next_item(self):
+        # Take one chunk from the job at the head, then rotate that job to the back.
+        job_id, queue = self._queues.popitem(last=False)
+        item = queue.popleft()
+        if queue:
+            self._queues[job_id] = queue
+        return item
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while self._in_flight >= self.max_in_flight or not self._queues:
+                    self._cond.wait()
+                future, fn, args = self._next_item()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._in_flight += 1
+            future.started_at = time.perf_counter()
+            try:
+                inner = self.executor.submit(fn, *args)
+            except Exception as e:
+                self._on_done(None, future, e)
+                continue
+            inner.add_done_callback(lambda done, outer=future: self._on_done(done, outer))
+
+    def _on_done(self, done: Future | None, outer: Future, error: Exception | None = None):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+        outer.run_seconds = time.perf_counter() - outer.started_at
+        error = error or done.exception()
+        if error:
+            outer.set_exception(error)
+        else:
+            outer.set_result(done.result())
+
+class ChunkCostModel:
+    """
+    Running least-squares fit of how long one work item takes on a worker:
+    `overhead_s + rtf * audio_seconds`. Older observations decay so the fit follows
+    the host's current load.
+    """
+
+    def __init__(self, overhead_s: float = 0.5, rtf: float = 0.15, decay: float = 0.98):
+        self.prior_overhead_s = overhead_s
+        self.prior_rtf = rtf
+        self.decay = decay
+        self._n = self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, audio_seconds: float, elapsed_seconds: float):
+        with self._lock:
+            d = self.decay
+            self._n = self._n * d + 1
+            self._sx = self._sx * d + audio_seconds
+            self._sy = self._sy * d + elapsed_seconds
+            self._sxx = self._sxx * d + audio_seconds * audio_seconds
+            self._sxy = self._sxy * d + audio_seconds * elapsed_seconds
+
+    def estimate(self) -> tuple[float, float]:
+        """Returns `(overhead_s, rtf)`, falling back to the priors until the data can separate them."""
+        with self._lock:
+            n, sx, sy, sxx, sxy = self._n, self._sx, self._sy, self._sxx, self._sxy
+        if n < 1 or sx <= 0:
+            return self.prior_overhead_s, self.prior_rtf
+        variance = n * sxx - sx * sx
+        if n < 3 or variance <= 1e-6 * n * sxx:
+            # All chunks were about the same length: keep the prior overhead, fit only the slope.
+            return self.prior_overhead_s, max((sy - n * self.prior_overhead_s) / sx, 1e-3)
+        rtf = max((n * sxy - sx * sy) / variance, 1e-3)
+        return max((sy - rtf * sx) / n, 0.01), rtf
+
+    def predict(self, audio_seconds: float) -> float:
+        overhead_s, rtf = self.estimate()
+        return overhead_s + rtf * audio_seconds
+
+    def chunk_seconds(self, duration_s: float, workers: int, min_s: float, max_s: float,
+                      jitter: float = 0.3) -> float:
+        """
+        Picks a chunk length for `duration_s` of audio on `workers` workers. Each extra
+        wave of chunks costs one more per-chunk overhead, while the straggling last
+        chunk costs roughly `jitter` of a chunk's run time, so the makespan
+        `waves * overhead + rtf * duration / workers + jitter * chunk_time` is smallest
+        at `chunk = sqrt(duration * overhead / (workers * jitter * rtf))`. The length
+        is then evened out so `duration_s` would split into a multiple of `workers`
+        chunks. That is only a target: `duration_s` includes silence the VAD drops,
+        and SpeechChunker groups speech at pauses, so the actual chunk count differs.
+        """
+        overhead_s, rtf = self.estimate()
+        ideal = math.sqrt(duration_s * overhead_s / (workers * jitter * rtf))
+        count = max(1, math.ceil(duration_s / min(max(ideal, min_s), max_s)))
+        count = math.ceil(count / workers) * workers
+        return min(max(duration_s / count, min_s), max_s)
+
+# Greedy decoding for the preview pass: no beam search and no temperature fallback.
+PREVIEW_DECODE_OPTIONS = {"beam_size": 1, "best_of": 1, "temperature": 0.0}
+
+# Re-decoding a straggler: greedy, a single temperature fallback, no conditioning on
+# earlier text and a repetition guard, which together cut off hallucination loops.
+STRAGGLER_DECODE_OPTIONS = {
+    "beam_size": 1,
+    "best_of": 1,
+    "temperature": [0.0, 0.2],
+    "compression_ratio_threshold": 2.0,
+    "condition_on_previous_text": False,
+    "no_repeat_ngram_size": 3,
+}
+STRAGGLER_PIECE_SECONDS = 10
+
+# Language codes Whisper can be told to transcribe in.
+# Copied from faster_whisper.tokenizer._LANGUAGE_CODES (faster-whisper 1.x, matching
+# openai-whisper's LANGUAGES), which is private and so not imported. Extend it if a
+# new model adds languages.
+SUPPORTED_LANGUAGES = frozenset((
+    "af", "am", "ar", "as", "az", "ba", "be", "bg", "bn", "bo", "br", "bs", "ca", "cs", "cy", "da", "de", "el",
+    "en", "es", "et", "eu", "fa", "fi", "fo", "fr", "gl", "gu", "ha", "haw", "he", "hi", "hr", "ht", "hu", "hy",
+    "id", "is", "it", "ja", "jw", "ka", "kk", "km", "kn", "ko", "la", "lb", "ln", "lo", "lt", "lv", "mg", "mi",
+    "mk", "ml", "mn", "mr", "ms", "mt", "my", "ne", "nl", "nn", "no", "oc", "pa", "pl", "ps", "pt", "ro", "ru",
+    "sa", "sd", "si", "sk", "sl", "sn", "so", "sq", "sr", "su", "sv", "sw", "ta", "te", "tg", "th", "tk", "tl",
+    "tr", "tt", "uk", "ur", "uz", "vi", "yi", "yo", "zh", "yue",
+))
+# Seconds of speech, taken from the start of the recording, used to detect its language.
+LANGUAGE_SAMPLE_SECONDS = 60
+# How often a queued work item is checked for having started running.
+STRAGGLER_POLL_SECONDS = 1.0
 
 class TranscriptionService:
     """Handles audio processing and transcription."""
 
     def __init__(self, config: AIServiceConfig):
         self.config = config
-        # Initialize the Whisper model once when the service is created.
-        # This is efficient as it loads the model into memory only once.
-        print(f"Loading Whisper model from: {self.config.whisper_model_path}")
-        self.whisper = WhisperModel(self.config.whisper_model_path, device="cpu", compute_type="int8")
+        self.decoder = PCMDecoder()
+        # Per Whisper model: a preview or per-upload model can run ten times faster or slower than the default.
+        self.cost_models: dict[str, ChunkCostModel] = {}
+        self.straggler_stats = {"work_items": 0, "redecoded": 0, "redecode_wins": 0}
+        self._stats_lock = threading.Lock()
+        self.batch_size = config.whisper_batch_size
+        # Overlapping chunks are stitched word by word, so they need word timings.
+        self.decode_options = {"word_timestamps": config.whisper_word_timestamps or config.chunk_overlap_seconds > 0}
+        tuned = None
+        if config.whisper_autotune:
+            # Only the stored result is read here; calibrating would stall startup (see app/autotune.py).
+            tuned = WhisperAutotuner(
+                config.whisper_model_path, config.whisper_autotune_compute_types,
+                config.whisper_autotune_cache_dir, clip_path=config.whisper_autotune_clip,
+            ).cached()
+            if tuned is None:
+                print("WHISPER_AUTOTUNE is on but no calibration is stored for this host; "
+                      "run `python -m app.autotune`. Using the configured settings.")
+        if tuned:
+            # Measured on this host; replaces the configured compute type, threads and worker count.
+            self.compute_type = tuned["compute_type"]
+            self.max_workers = tuned["num_workers"]
+            self.cpu_threads = tuned["cpu_threads"]
+        else:
+            self.compute_type = config.whisper_compute_type
+            self.max_workers = config.transcription_workers
+            # Split the cores between workers so the pool never oversubscribes the CPU.
+            self.cpu_threads = config.whisper_cpu_threads or max(1, (os.cpu_count() or 1) // self.max_workers)
+        # Models are loaded lazily on first use, so constructing the service is instant.
+        self.models = None
+
+        if config.transcription_executor == "process":
+            # Spawn (not fork) so no CTranslate2 or thread state leaks into the workers.
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_transcription_worker,
+                initargs=(self.compute_type, self.cpu_threads, config.whisper_max_resident_models),
+            )
+        else:
+            # num_workers lets CTranslate2 run that many transcribe() calls concurrently on one model.
+            self.models = WhisperModelRegistry(
+                self.compute_type, self.cpu_threads,
+                num_workers=self.max_workers, max_resident=config.whisper_max_resident_models,
+            )
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="whisper")
+
+        # Shared by every meeting; fills the executor exactly so queued work stays
+        # in the scheduler where it can be interleaved fairly.
+        self.scheduler = TranscriptionScheduler(self.executor, max_in_flight=self.max_workers)
+        self.cache = DiskCache(config.transcript_cache_dir, max_bytes=config.transcript_cache_max_mb * 1024 * 1024)
+
+    def cost_model(self, model: str | None = None) -> ChunkCostModel:
+        """The fitted work-item cost of `model` (the default model if None); used for chunk planning and deadlines."""
+        model = model or self.config.whisper_model_path
+        with self._stats_lock:
+            return self.cost_models.setdefault(model, ChunkCostModel())
+
+    def stats(self) -> dict:
+        overhead_s, rtf = self.cost_model().estimate()
+        return {
+            **self.scheduler.stats(),
+            "resident_models": self.models.resident if self.models else [],
+            "chunk_overhead_seconds": round(overhead_s, 3),
+            "chunk_rtf": round(rtf, 4),
+            **self._straggler_snapshot(),
+        }
+
+    def _straggler_snapshot(self) -> dict:
+        with self._stats_lock:
+            return {f"straggler_{name}": value for name, value in self.straggler_stats.items()}
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.straggler_stats[name] += 1
+
+    def plan_chunk_seconds(self, filepath: str, model: str | None = None) -> float:
+        """
+        Chooses the maximum chunk length for `filepath` from its duration, the worker
+        count and the measured per-chunk cost of `model`. Falls back to
+        VAD_MAX_CHUNK_SECONDS when the duration can't be probed.
+        """
+        duration = probe_duration(filepath)
+        if not duration:
+            return self.config.vad_max_chunk_seconds
+        return self.cost_model(model).chunk_seconds(
+            duration, self.max_workers,
+            min_s=self.config.min_chunk_seconds, max_s=self.config.vad_max_chunk_seconds,
+        )
+
+    def cache_key(self, filepath: str, model: str, options: dict) -> str:
+        """Identifies a transcript by the upload's bytes plus every setting that changes the output."""
+        return DiskCache.make_key(
+            hash_file(filepath),
+            model,
+            self.compute_type,
+            self.config.vad_max_chunk_seconds,
+            self.config.vad_min_silence_ms,
+            self.config.chunk_overlap_seconds,
+            self.batch_size,
+            options,
+        )
+
+    def _split_audio(self, filepath: str, chunk_seconds: float, source=None, spool: PCMSpool | None = None):
+        """
+        Streams the file (or the still-arriving `source` bytes) through ffmpeg and
+        yields `(offset_seconds, audio)` speech chunks of at most `chunk_seconds`,
+        cut at silences by the VAD. Non-speech audio never reaches Whisper.
+        With a `spool`, the decoded PCM is written to it and each chunk's audio is
+        a `SpoolSlice` of the spool file rather than an array.
+        """
+        chunker = SpeechChunker(
+            max_chunk_s=chunk_seconds,
+            min_silence_ms=self.config.vad_min_silence_ms,
+            overlap_s=min(self.config.chunk_overlap_seconds, chunk_seconds / 4),
+        )
+        if source is not None:
+            blocks = self.decoder.stream_bytes(source, block_seconds=chunk_seconds)
+        else:
+            blocks = self.decoder.stream(filepath, block_seconds=chunk_seconds)
+        if spool is None:
+            yield from chunker.chunks(blocks)
+            return
+        for offset, chunk in chunker.chunks(spool.tee(blocks)):
+            yield offset, spool.slice(offset, len(chunk))
+
+    def speech_chunks(self, filepath: str, chunk_seconds: float | None = None):
+        """The `(offset_seconds, audio)` speech chunks Whisper would be given for a finished file."""
+        yield from self._split_audio(filepath, chunk_seconds or self.config.vad_max_chunk_seconds)
 
-    def _convert_to_wav(self, filepath: str) -> io.BytesIO:
+    def _transcribe_chunk(self, model: str, chunk: np.ndarray, options: dict) -> list[dict]:
+        return _decode_chunk(self.models.get(model), chunk, options)
+
+    def _transcribe_batch(self, model: str, chunks: list[np.ndarray], batch_size: int,
+                          options: dict) -> list[list[dict]]:
+        return _decode_batch(self.models.get_batched(model), chunks, batch_size, options)
+
+    def _transcribe_pieces(self, model: str, pieces: list[tuple[float, np.ndarray]], options: dict) -> list[dict]:
+        return _decode_pieces(self.models.get(model), pieces, options)
+
+    def _detect(self, model: str, audio: np.ndarray) -> tuple[str, float]:
+        return _detect_language(self.models.get(model), audio)
+
+    def _submit(self, job_id: str, model: str, chunks: list[np.ndarray], options: dict) -> Future:
+        """Queues one work item: a single chunk, or a whole batch when batching is enabled."""
+        in_process_pool = isinstance(self.executor, ProcessPoolExecutor)
+        if self.batch_size > 1:
+            fn = _transcribe_batch_in_worker if in_process_pool else self._transcribe_batch
+            return self.scheduler.submit(job_id, fn, model, chunks, self.batch_size, options)
+        fn = _transcribe_in_worker if in_process_pool else self._transcribe_chunk
+        return self.scheduler.submit(job_id, fn, model, chunks[0], options)
+
+    def _submit_redecode(self, job_id: str, model: str, chunk: np.ndarray, options: dict) -> asyncio.Future:
+        """Queues a straggling chunk again, split into short pieces and decoded with tighter settings."""
+        piece = min(STRAGGLER_PIECE_SECONDS * SAMPLE_RATE, max(len(chunk) // 2, 1))
+        pieces = [(start / SAMPLE_RATE, chunk[start:start + piece]) for start in range(0, len(chunk), piece)]
+        fn = _transcribe_pieces_in_worker if isinstance(self.executor, ProcessPoolExecutor) else self._transcribe_pieces
+        # A separate scheduler job, so the retry is interleaved ahead of this meeting's backlog.
+        future = self.scheduler.submit(f"{job_id}:redecode", fn, model, pieces, {**options, **STRAGGLER_DECODE_OPTIONS})
+        return asyncio.wrap_future(future)
+
+    async def _decode_item(self, job_id: str, model: str, chunks: list[np.ndarray], options: dict) -> list[list[dict]]:
         """
-        Converts any audio/video file to a 16kHz mono WAV file, which is
-        the required format for whisper.cpp.
+        Runs one work item and returns segments per chunk. If it runs longer than
+        STRAGGLER_DEADLINE_FACTOR times its predicted run time, every chunk is
+        re-decoded in shorter pieces with tighter settings and the first attempt to
+        finish wins.
         """
-        audio = AudioSegment.from_file(filepath)
-        audio = audio.set_channels(1).set_frame_rate(16000)
+        future = self._submit(job_id, model, chunks, options)
+        primary = asyncio.wrap_future(future)
+        retry = None
+        audio_seconds = sum(len(chunk) for chunk in chunks) / SAMPLE_RATE
+        cost_model = self.cost_model(model)
+        deadline = max(self.config.straggler_min_deadline_seconds,
+                       self.config.straggler_deadline_factor * cost_model.predict(audio_seconds))
+        self._count("work_items")
+        try:
+            # The deadline counts from when the item starts running, not from when it was queued.
+            while self.config.straggler_deadline_factor > 0 and not primary.done():
+                started_at = getattr(future, "started_at", None)
+                if started_at is not None and time.perf_counter() - started_at >= deadline:
+                    break
+                timeout = STRAGGLER_POLL_SECONDS if started_at is None else started_at + deadline - time.perf_counter()
+                await asyncio.wait({primary}, timeout=max(timeout, 0))
 
-        buf = io.BytesIO()
-        audio.export(buf, format="wav")
-        buf.seek(0)
-        return buf
+            if not primary.done():
+                self._count("redecoded")
+                print(f"[{job_id}] Chunk exceeded its {deadline:.1f}s deadline, re-decoding with tighter settings.")
+                retry = asyncio.gather(*(self._submit_redecode(job_id, model, chunk, options) for chunk in chunks))
+                await asyncio.wait({primary, retry}, return_when=asyncio.FIRST_COMPLETED)
+                if not primary.done() and retry.exception() is not None:
+                    # The re-decode failed, but the original attempt may still succeed.
+                    print(f"[{job_id}] Re-decode failed ({retry.exception()!r}); waiting for the original decode.")
+                    await asyncio.wait({primary})
+                elif not primary.done() or primary.exception() is not None:
+                    results = await retry
+                    self._count("redecode_wins")
+                    return results
 
-    def _split_audio(self, wav_buffer: io.BytesIO, chunk_length_ms: int = 120000):
+            results = primary.result()
+            cost_model.observe(audio_seconds, future.run_seconds)
+            return results if self.batch_size > 1 else [results]
+        finally:
+            # A decode already running on a worker can't be interrupted; its result is just ignored.
+            for pending in (primary, retry):
+                if pending is not None and not pending.done():
+                    pending.cancel()
+
+    async def detect_language(self, filepath: str, job_id: str | None = None, model: str | None = None,
+                              source=None) -> str:
         """
-        Split audio into chunks
+        Detects the recording's language once from up to LANGUAGE_SAMPLE_SECONDS of
+        its speech, so every chunk can then be decoded with the same language instead
+        of each chunk running (and possibly disagreeing on) its own detection.
+        English-only models skip detection.
         """
-        audio = AudioSegment.from_file(wav_buffer)
-        chunks = []
+        job_id = job_id or filepath
+        model = model or self.config.whisper_model_path
+        if model.endswith(".en"):
+            return "en"
+
+        sample, sample_length = [], 0
+        # Closing the generator early stops ffmpeg, so only the head of the file is decoded.
+        chunks = self._split_audio(filepath, self.config.vad_max_chunk_seconds, source)
+        try:
+            for _offset, chunk in chunks:
+                sample.append(chunk)
+                sample_length += len(chunk)
+                if sample_length >= LANGUAGE_SAMPLE_SECONDS * SAMPLE_RATE:
+                    break
+        finally:
+            chunks.close()
+        if not sample:
+            # No speech found; any language decodes silence equally well.
+            return "en"
+
+        fn = _detect_language_in_worker if isinstance(self.executor, ProcessPoolExecutor) else self._detect
+        audio = np.concatenate(sample)[:LANGUAGE_SAMPLE_SECONDS * SAMPLE_RATE]
+        language, probability = await asyncio.wrap_future(self.scheduler.submit(job_id, fn, model, audio))
+        print(f"[{job_id}] Detected language '{language}' (p={probability:.2f}).")
+        return language
 
-        for i in range(0, len(audio), chunk_length_ms):
-            chunk = audio[i:i + chunk_length_ms]
-            buf = io.BytesIO()
-            chunk.export(buf, format="wav")
-            buf.seek(0)
-            chunks.append(buf)
+    async def preview(self, filepath: str, job_id: str | None = None, language: str | None = None) -> dict:
+        """
+        Quick, rough pass with the small preview model and greedy decoding, meant
+        to give users something to read while the full-quality pass runs.
+        """
+        return await self.transcribe(
+            filepath, job_id=job_id, model=self.config.whisper_preview_model,
+            options={**PREVIEW_DECODE_OPTIONS, "language": language},
+        )
 
-        return chunks
+    async def transcribe(self, filepath: str, job_id: str | None = None, model: str | None = None,
+                         options: dict | None = None, completed: dict[int, dict] | None = None,
+                         on_chunk=None, source=None, chunk_seconds: float | None = None, on_audio=None) -> dict:
+        """
+        Transcribes `filepath` chunk by chunk with `model` (the configured default
+        when omitted) and returns `{"transcript", "segments", "cache_key"}`, where
+        `cache_key` identifies the transcript in the cache for entries derived from it. `options` are extra
+        Whisper decode options layered over the configured ones; pass `language`
+        (see `detect_language`) so chunks are not each detected separately.
+        Chunks listed in `completed` (index -> `{"offset", "duration", "segments"}`,
+        e.g. restored from a checkpoint) are not decoded again, and
+        `on_chunk(index, chunk_result)` is called as each new chunk finishes. When
+        `source` is given, audio is decoded from those bytes while the upload is
+        still arriving at `filepath`.
+        `chunk_seconds` must be given again when resuming from `completed`, so the
+        chunk indices line up; by default it is planned from the file's duration.
+        `on_audio(offset_seconds, audio)` receives every speech chunk as it is
+        decoded, so other stages can share the decoded PCM. It is not called when
+        the transcript comes from the cache.
+        """
+        job_id = job_id or filepath
+        model = model or self.config.whisper_model_path
+        options = {**self.decode_options, **(options or {})}
+        completed = dict(completed or {})
+        # A file still being uploaded can't be hashed yet; it is cached once complete.
+        cache_key = self.cache_key(filepath, model, options) if source is None else None
+        cached = self.cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            print(f"[{job_id}] Transcript cache hit, skipping Whisper.")
+            return {**cached, "cache_key": cache_key}
 
-    def _transcribe_chunk(self, chunk: io.BytesIO) -> str:
-        segments, _ = self.whisper.transcribe(chunk)
-        return " ".join(segment.text for segment in segments)
+        def record(batch: list[tuple], task: asyncio.Future):
+            if task.cancelled() or task.exception() is not None:
+                return
+            for (index, offset, chunk), segments in zip(batch, task.result()):
+                completed[index] = {"offset": offset, "duration": len(chunk) / SAMPLE_RATE, "segments": segments}
+                if on_chunk:
+                    on_chunk(index, completed[index])
 
-    async def transcribe(self, filepath: str) -> str:
-        wav_buffer = self._convert_to_wav(filepath)
-        chunks = self._split_audio(wav_buffer)
+        def submit(batch: list[tuple]):
+            task = asyncio.ensure_future(
+                self._decode_item(job_id, model, [chunk for _index, _offset, chunk in batch], options)
+            )
+            task.add_done_callback(lambda done: record(batch, done))
+            tasks.append(task)
 
-        # Use ProcessPoolExecutor to handle CPU-bound transcription tasks
-        loop = asyncio.get_event_loop()
-        # Use ThreadPoolExecutor instead of ProcessPoolExecutor
-        with ThreadPoolExecutor(max_workers=8) as pool:
-            tasks = [
-                loop.run_in_executor(pool, self._transcribe_chunk, chunk)
-                for chunk in chunks
-            ]
-            results = await asyncio.gather(*tasks)
+        # Cap how many decoded chunks this meeting keeps queued or running so peak
+        # memory stays flat regardless of recording length.
+        max_pending = self.max_workers * 2
+        tasks, batch = [], []
+        # Queued chunks are then just file ranges; the audio itself stays in the page cache.
+        spool = PCMSpool(self.config.pcm_spool_dir) if self.config.pcm_spool_enabled else None
+        try:
+            if chunk_seconds is None:
+                chunk_seconds = (self.plan_chunk_seconds(filepath, model) if source is None
+                                 else self.config.vad_max_chunk_seconds)
+            for index, (offset, chunk) in enumerate(self._split_audio(filepath, chunk_seconds, source, spool)):
+                if on_audio:
+                    on_audio(offset, _pcm(chunk))
+                if index in completed:
+                    continue
+                batch.append((index, offset, chunk))
+                if len(batch) < self.batch_size:
+                    continue
+                pending = [task for task in tasks if not task.done()]
+                if len(pending) >= max_pending:
+                    await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                submit(batch)
+                batch = []
+            if batch:
+                submit(batch)
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Don't leave this meeting's queued chunks occupying the shared scheduler.
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            if spool:
+                spool.close()
 
-        return " ".join(results)
+        result = _assemble_transcript(completed)
+        cache_key = cache_key or self.cache_key(filepath, model, options)
+        self.cache.set(cache_key, result)
+        return {**result, "cache_key": cache_key}
 
 class InsightExtractor:
     """Extracts structured insights using an LLM."""
 
-    def __init__(self, config: AIServiceConfig):
+    # Part of every cached response's key; bump it whenever a prompt template changes.
+    PROMPT_VERSION = "1"
+
+    def __init__(self, config: AIServiceConfig, ollama: OllamaClient, cache: LLMResponseCache):
         self.config = config
+        self.ollama = ollama
+        self.cache = cache
 
-    def _get_prompt(self, transcript: str) -> str:
+    def _get_prompt(self, transcript: str, speaker_labelled: bool = False, part: tuple[int, int] | None = None) -> str:
+        part_note = f"""
+        The transcript below is only part {part[0]} of {part[1]} of a longer meeting. Extract what appears in this
+        part; the parts are combined afterwards.""" if part else ""
+        speakers_note = """
+        Each line of the transcript starts with an anonymous speaker label (SPEAKER_1, SPEAKER_2, ...) from voice
+        analysis. Use the labels to tell speakers apart and to attribute statements, but list only real names as
+        participants.""" if speaker_labelled else ""
         return f"""You are an expert meeting analysis assistant. Your task is to perform a two-step analysis of the 
         meeting transcript below and provide the output in a single, strict JSON format.
         **Step 1: Identify Participants**
@@ -114,12 +903,112 @@ class InsightExtractor:
         - "decisions": A list of key decisions made during the meeting.
         - "keywords": A list of 5-7 single-word or two-word key topics.
         - "sentiment": The overall meeting sentiment. Must be one of: "Positive", "Neutral", "Negative".
-        Do not include any preamble or explanation outside of the JSON object.
+        Do not include any preamble or explanation outside of the JSON object.{speakers_note}{part_note}
         **Transcript:**
         \"\"\"
         {transcript}
         \"\"\"
         """
+    def _get_reduce_prompt(self, summaries: list[str]) -> str:
+        parts = "\n".join(f"{i}. {summary}" for i, summary in enumerate(summaries, start=1))
+        return f"""You are an expert meeting analysis assistant. Below are summaries of consecutive parts of one
+        meeting, in order. Combine them into a single concise, neutral summary of the meeting's purpose and key
+        discussion points. Respond with a strict JSON object with one key, "summary".
+        **Part summaries:**
+        {parts}
+        """
+
+    def _split_sections(self, text: str) -> list[str]:
+        """
+        Splits `text` into sections of at most INSIGHT_SECTION_TOKENS (estimated at
+        four characters per token), cutting between speaker turns or sentences.
+        """
+        budget = self.config.insight_section_tokens * 4
+        if len(text) <= budget:
+            return [text]
+        separator = "\n" if "\n" in text else " "
+        units = text.split("\n") if separator == "\n" else re.split(r"(?<=[.!?])\s+", text)
+
+        sections, current, size = [], [], 0
+        for unit in units:
+            # A single turn or sentence longer than a section is cut between words.
+            pieces = [unit]
+            if len(unit) > budget:
+                words, pieces, piece = unit.split(), [], ""
+                for word in words:
+                    if piece and len(piece) + len(word) + 1 > budget:
+                        pieces.append(piece)
+                        piece = ""
+                    piece = f"{piece} {word}" if piece else word
+                pieces.append(piece)
+            for piece in pieces:
+                if current and size + len(piece) + 1 > budget:
+                    sections.append(separator.join(current))
+                    current, size = [], 0
+                current.append(piece)
+                size += len(piece) + 1
+        if current:
+            sections.append(separator.join(current))
+        return sections
+
+    async def _map_reduce(self, sections: list[str], speaker_labelled: bool) -> dict:
+        """
+        Extracts partial insights from each section concurrently, then merges them:
+        lists are combined and de-duplicated, sentiment is a length-weighted vote,
+        and the section summaries are condensed by one more, short LLM call.
+        """
+        prompts = [self._get_prompt(section, speaker_labelled, part=(i, len(sections)))
+                   for i, section in enumerate(sections, start=1)]
+        slots = asyncio.Semaphore(self.config.insight_parallel_requests)
+
+        async def generate(prompt: str) -> dict:
+            async with slots:
+                return await self._generate(prompt)
+
+        # A failed section costs only its own fields, not those of the sections that succeeded.
+        results = await asyncio.gather(*(generate(prompt) for prompt in prompts), return_exceptions=True)
+        failures = [result for result in results if isinstance(result, BaseException)]
+        for i, result in enumerate(results, start=1):
+            if isinstance(result, BaseException):
+                print(f"Insight extraction failed for section {i}/{len(sections)}: {result!r}")
+        if len(failures) == len(results) or any(not isinstance(failure, Exception) for failure in failures):
+            raise failures[0]
+        sections, partials = zip(*((section, result) for section, result in zip(sections, results)
+                                   if not isinstance(result, BaseException)))
+
+        def unique(values, key=lambda value: str(value).strip().lower()):
+            seen, merged = set(), []
+            for value in values:
+                if value and key(value) not in seen:
+                    seen.add(key(value))
+                    merged.append(value)
+            return merged
+
+        votes = {}
+        for section, partial in zip(sections, partials):
+            sentiment = partial.get("sentiment")
+            if sentiment in ("Positive", "Neutral", "Negative"):
+                votes[sentiment] = votes.get(sentiment, 0) + len(section)
+
+        summaries = [partial["summary"] for partial in partials if partial.get("summary")]
+        summary = None
+        if len(summaries) > 1:
+            try:
+                summary = (await self._generate(self._get_reduce_prompt(summaries))).get("summary")
+            except (httpx.HTTPError, json.JSONDecodeError) as e:
+                print(f"Summary merge failed, joining section summaries instead: {e!r}")
+        return {
+            "participants": unique(name for partial in partials for name in partial.get("participants", [])),
+            "summary": summary or " ".join(summaries),
+            "action_items": unique(
+                (item for partial in partials for item in partial.get("action_items", []) if isinstance(item, dict)),
+                key=lambda item: str(item.get("task", "")).strip().lower(),
+            ),
+            "decisions": unique(decision for partial in partials for decision in partial.get("decisions", [])),
+            "keywords": unique(keyword for partial in partials for keyword in partial.get("keywords", [])),
+            "sentiment": max(votes, key=votes.get) if votes else "Neutral",
+        }
+
     def _calculate_keyword_frequency(self, keywords: list, transcript: str) -> list:
         """Counts the occurrences of each keyword in the transcript."""
         frequencies = []
@@ -135,35 +1024,84 @@ class InsightExtractor:
         frequencies.sort(key=lambda x: x['count'], reverse=True)
         return frequencies[:7]
 
-    def extract(self, transcript: str) -> dict:
+    async def _generate(self, prompt: str, on_field=None) -> dict:
+        """
+        Runs one JSON-mode generation and returns the parsed object. Top-level fields
+        are parsed as they stream in and passed to `on_field(key, value)` (a
+        coroutine function) as each one completes. If the response breaks off or
+        ends malformed, the fields completed before that are still returned.
+        Complete responses are cached, and a cached one is replayed field by field.
+        """
         payload = {
                     "model": self.config.ollama_llm_model,
-                    "prompt": self._get_prompt(transcript),
+                    "prompt": prompt,
                     "format": "json",
-                    "stream": True
+                    "stream": True,
+                    # Without this Ollama silently truncates long prompts to its default context.
+                    "options": {"num_ctx": self.config.ollama_num_ctx},
         }
-        try:
-            with httpx.Client(timeout=None) as client:
-                with client.stream("POST", self.config.ollama_api_url, json=payload) as response:
-                    response.raise_for_status()
-                    insights = ""
+        cache_key = self.cache.request_key(payload["model"], self.PROMPT_VERSION,
+                                           {"format": payload["format"], **payload["options"]}, prompt)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            for key, value in cached.items():
+                if on_field:
+                    await on_field(key, value)
+            return cached
 
-                    for line in response.iter_lines():
-                        if line.strip():
-                            chunk = json.loads(line)
-                            # Ollama puts the actual partial text in chunk['response']
-                            insights += chunk.get("response", "")
+        parser = StreamingJSONObject()
+        async for chunk in self.ollama.stream_lines(self.config.ollama_api_url, payload):
+            # Ollama puts the actual partial text in chunk['response']
+            for key, value in parser.feed(chunk.get("response", "")):
+                if on_field:
+                    await on_field(key, value)
 
-                # At this point, full_text contains the reconstructed JSON string
-                insights = json.loads(insights)
+        if not parser.complete:
+            if not parser.fields:
+                raise json.JSONDecodeError("LLM response contained no complete JSON field", "", 0)
+            print(f"LLM response ended early; keeping {len(parser.fields)} complete fields.")
+        elif not parser.skipped:
+            # Only clean responses are cached; a retry may well fix a malformed field.
+            self.cache.set(cache_key, parser.fields)
+        return parser.fields
 
-                if 'keywords' in insights and isinstance(insights['keywords'], list):
-                    # Replace the simple list of keywords with our new list of objects
-                    insights['keywords'] = self._calculate_keyword_frequency(insights['keywords'], transcript)
+    async def _extract(self, transcript: str, labelled_transcript: str | None, on_field) -> dict:
+        text = labelled_transcript or transcript
 
-            return insights
+        async def emit(key: str, value):
+            if key == 'keywords' and isinstance(value, list):
+                # Replace the simple list of keywords with our new list of objects
+                value = self._calculate_keyword_frequency(value, transcript)
+            if on_field:
+                # Callbacks may block (e.g. database writes); keep them off the shared loop.
+                await asyncio.to_thread(on_field, key, value)
+            return value
 
-        except (httpx.RequestError, json.JSONDecodeError, KeyError) as e:
+        sections = self._split_sections(text)
+        if len(sections) == 1:
+            insights = await self._generate(self._get_prompt(text, speaker_labelled=bool(labelled_transcript)), emit)
+            if isinstance(insights.get('keywords'), list):
+                insights['keywords'] = self._calculate_keyword_frequency(insights['keywords'], transcript)
+        else:
+            print(f"Long transcript: extracting insights from {len(sections)} sections.")
+            insights = await self._map_reduce(sections, speaker_labelled=bool(labelled_transcript))
+            # Partial section results aren't meaningful on their own; emit the merged fields.
+            for key, value in list(insights.items()):
+                insights[key] = await emit(key, value)
+        return insights
+
+    def extract(self, transcript: str, labelled_transcript: str | None = None, on_field=None) -> dict:
+        """
+        Extracts insights from `transcript`. When a speaker-labelled version of it is
+        given, the LLM is shown that instead; keyword counts still use the plain text.
+        Transcripts longer than one section are processed map-reduce style.
+        `on_field(key, value)` is called from another thread as each top-level
+        field becomes available, before the whole response has been generated.
+        """
+        try:
+            return self.ollama.run(self._extract(transcript, labelled_transcript, on_field))
+
+        except (httpx.HTTPError, json.JSONDecodeError, KeyError) as e:
             print(f"Ollama insight extraction error: {e}")
             return {"summary": "Error extracting insights.", "action_items": [], "decisions": [], "keywords": [], "sentiment": "Unknown"}
 
@@ -172,50 +1110,98 @@ class InsightExtractor:
 class VectorStoreService:
     """Manages vector embeddings and semantic search with ChromaDB."""
 
-    def __init__(self, config: AIServiceConfig):
+    # Part of every cached answer's key; bump it whenever the RAG prompt changes.
+    PROMPT_VERSION = "1"
+
+    def __init__(self, config: AIServiceConfig, ollama: OllamaClient, cache: LLMResponseCache):
         self.config = config
+        self.ollama = ollama
+        self.cache = cache
         self.client = chromadb.PersistentClient(path="chromadb")
         self.collection = self.client.get_or_create_collection(name="meeting_transcripts")
 
-    def _get_embedding(self, text: str) -> list[float] | None:
+    async def _embed(self, text: str) -> list[float] | None:
         payload = {"model": self.config.ollama_embed_model, "prompt": text}
         try:
-            with httpx.Client(timeout=None) as client:
-                response = client.post(self.config.ollama_embed_url, json=payload)
-                response.raise_for_status()
-                return response.json()['embedding']
-        except (httpx.RequestError, KeyError) as e:
+            return (await self.ollama.post_json(self.config.ollama_embed_url, payload))['embedding']
+        except (httpx.HTTPError, KeyError) as e:
             print(f"Ollama embedding error: {e}")
             return None
 
+    async def _embed_all(self, texts: list[str]) -> list[list[float] | None]:
+        """Embeds `texts` concurrently, one request per pooled connection at most."""
+        slots = asyncio.Semaphore(self.ollama.max_connections)
+
+        async def embed(text: str):
+            async with slots:
+                return await self._embed(text)
+
+        return await asyncio.gather(*(embed(text) for text in texts))
+
+    def _get_embedding(self, text: str) -> list[float] | None:
+        return self.ollama.run(self._embed(text))
+
     def _chunk_text(self, text: str, chunk_size=300, overlap=50) -> list[str]:
         words = text.split()
         if not words: return []
         return [" ".join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size - overlap)]
 
-    def add_transcript(self, meeting_id: int, transcript: str):
-        chunks = self._chunk_text(transcript)
-        if not chunks: return
+    def _chunk_segments(self, segments: dict, chunk_size=300, overlap=50) -> list[tuple[str, float, float]]:
+        """Same windows as `_chunk_text`, but each keeps the time span of the segments it covers."""
+        words = []
+        for start, end, text in zip(segments["start"], segments["end"], segments["text"]):
+            words.extend((word, start, end) for word in text.split())
+        windows = []
+        for i in range(0, len(words), chunk_size - overlap):
+            window = words[i:i + chunk_size]
+            windows.append((" ".join(word for word, _, _ in window), window[0][1], window[-1][2]))
+        return windows
 
-        embeddings = [self._get_embedding(chunk) for chunk in chunks if self._get_embedding(chunk) is not None]
+    def add_transcript(self, meeting_id: int, transcript: str, segments: dict | None = None):
+        if segments and segments.get("text"):
+            windows = self._chunk_segments(segments)
+        else:
+            windows = [(chunk, None, None) for chunk in self._chunk_text(transcript)]
+        if not windows: return
+
+        documents, embeddings, metadata = [], [], []
+        window_embeddings = self.ollama.run(self._embed_all([text for text, _start, _end in windows]))
+        for (text, start, end), embedding in zip(windows, window_embeddings):
+            if embedding is None:
+                continue
+            meta = {"meeting_id": meeting_id}
+            if start is not None:
+                meta.update(start=start, end=end)
+            documents.append(text)
+            embeddings.append(embedding)
+            metadata.append(meta)
         if not embeddings: return
 
-        valid_chunks = [chunk for i, chunk in enumerate(chunks) if embeddings[i] is not None]
-        doc_ids = [f"{meeting_id}_{i}" for i in range(len(valid_chunks))]
-        metadata = [{"meeting_id": meeting_id} for _ in valid_chunks]
+        doc_ids = [f"{meeting_id}_{i}" for i in range(len(documents))]
+        # Upsert so a resumed pipeline can re-run this stage without duplicate IDs.
+        self.collection.upsert(embeddings=embeddings, documents=documents, metadatas=metadata, ids=doc_ids)
+
+    def copy_transcript(self, source_id: int, target_id: int):
+        """Stores `source_id`'s embedded transcript again under `target_id`, without re-embedding it."""
+        existing = self.collection.get(where={"meeting_id": source_id}, include=["documents", "embeddings", "metadatas"])
+        if not existing["ids"]: return
 
-        self.collection.add(embeddings=embeddings, documents=valid_chunks, metadatas=metadata, ids=doc_ids)
+        doc_ids = [doc_id.replace(f"{source_id}_", f"{target_id}_", 1) for doc_id in existing["ids"]]
+        metadata = [{**meta, "meeting_id": target_id} for meta in existing["metadatas"]]
+        self.collection.upsert(embeddings=existing["embeddings"], documents=existing["documents"],
+                               metadatas=metadata, ids=doc_ids)
 
-    def search(self, meeting_id: int, query: str, n_results=3) -> str:
+    def search(self, meeting_id: int, query: str, n_results=3) -> dict:
         """
         Performs Retrieval-Augmented Generation.
         1. Retrieves relevant chunks from the vector store.
         2. Feeds them to an LLM to synthesize an answer.
+        Returns the answer plus the retrieved chunks with their time span, when known.
         """
         # 1. Retrieval
         query_embedding = self._get_embedding(query)
         if not query_embedding:
-            return "Could not process your query."
+            return {"answer": "Could not process your query.", "sources": []}
 
         results = self.collection.query(
             query_embeddings=[query_embedding],
@@ -223,9 +1209,15 @@ class VectorStoreService:
             where={"meeting_id": meeting_id}
         )
         context_chunks = results['documents'][0] if results and results['documents'] else []
+        context_meta = results['metadatas'][0] if results and results.get('metadatas') else [{}] * len(context_chunks)
+        sources = [
+            {"text": text, "start": meta.get("start"), "end": meta.get("end")}
+            for text, meta in zip(context_chunks, context_meta)
+        ]
 
         if not context_chunks:
-            return "I couldn't find any information related to your query in this meeting's transcript."
+            return {"answer": "I couldn't find any information related to your query in this meeting's transcript.",
+                    "sources": []}
 
         # 2. Generation
         context_str = "\n\n".join(context_chunks)
@@ -245,24 +1237,18 @@ class VectorStoreService:
             "prompt": rag_prompt,
             "stream": False
         }
+        cache_key = self.cache.request_key(payload["model"], self.PROMPT_VERSION, {}, rag_prompt)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return {"answer": cached["response"], "sources": sources}
         try:
-            with httpx.Client(timeout=None) as client:
-                with client.stream("POST", self.config.ollama_api_url, json=payload) as response:
-                    response.raise_for_status()
-                    full_text = ""
+            response = self.ollama.run(self.ollama.post_json(self.config.ollama_api_url, payload))
+            self.cache.set(cache_key, {"response": response["response"]})
+            return {"answer": response["response"], "sources": sources}
 
-                    for line in response.iter_lines():
-                        if line.strip():
-                            chunk = json.loads(line)
-                            # Ollama puts the actual partial text in chunk['response']
-                            full_text += chunk.get("response", "")
-
-            # At this point, full_text contains the reconstructed JSON string
-            return full_text
-
-        except (httpx.RequestError, json.JSONDecodeError, KeyError) as e:
+        except (httpx.HTTPError, json.JSONDecodeError, KeyError) as e:
             print(f"Ollama insight extraction error: {e}")
-            return "There was an error generating an answer."
+            return {"answer": "There was an error generating an answer.", "sources": sources}
 
 class AIPipeline:
     """Orchestrates the entire AI processing workflow."""
@@ -270,32 +1256,242 @@ class AIPipeline:
     def __init__(self, db_session_factory: sessionmaker):
         self.config = AIServiceConfig()
         self.transcriber = TranscriptionService(self.config)
-        self.extractor = InsightExtractor(self.config)
-        self.vector_store = VectorStoreService(self.config)
+        # One pooled HTTP client for every Ollama call the pipeline makes.
+        self.ollama = self.config.create_ollama_client()
+        # Identical LLM requests (retries, re-analysis) are answered from disk.
+        self.llm_cache = self.config.create_llm_cache()
+        self.extractor = InsightExtractor(self.config, self.ollama, self.llm_cache)
+        self.vector_store = VectorStoreService(self.config, self.ollama, self.llm_cache)
+        self.fingerprinter = AudioFingerprinter(seconds=self.config.fingerprint_seconds)
         self.db_session_factory = db_session_factory
+        # Relays insight fields to live listeners (the SSE endpoint) as they are generated.
+        self.insight_events = InsightBroadcaster()
+        # Meetings with a pipeline running or scheduled in this process.
+        self.active_meetings: set[int] = set()
+        self._active_lock = threading.Lock()
+
+    def claim(self, meeting_id: int) -> bool:
+        """Marks a meeting as scheduled before its pipeline starts; False if one is already running or scheduled."""
+        with self._active_lock:
+            if meeting_id in self.active_meetings:
+                return False
+            self.active_meetings.add(meeting_id)
+            return True
+
+    def remove_stale_uploads(self):
+        """Deletes the kept uploads of unfinished meetings older than UNFINISHED_UPLOAD_RETENTION_DAYS. Run at startup."""
+        if self.config.unfinished_upload_retention_days <= 0:
+            return
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+            days=self.config.unfinished_upload_retention_days)
+        db = self.db_session_factory()
+        try:
+            for meeting in meeting_crud.get_unfinished_uploads(db, cutoff):
+                if meeting.id in self.active_meetings:
+                    continue
+                if os.path.exists(meeting.upload_path):
+                    os.remove(meeting.upload_path)
+                meeting_crud.clear_upload_path(db, meeting.id)
+                print(f"[{meeting.id}] Removed the upload of this unfinished meeting; it can no longer be resumed.")
+        finally:
+            db.close()
+
+    def _index_fingerprint(self, db, meeting_id: int, filepath: str, source=None) -> tuple[np.ndarray | None, float | None]:
+        """Fingerprints the start of the recording and adds it, with the recording's length, to the index."""
+        fingerprint = self.fingerprinter.fingerprint_file(filepath, source)
+        if fingerprint is None:
+            return None, None
+        if source is not None:
+            source.wait()
+        duration = probe_duration(filepath)
+        meeting_crud.save_fingerprint(db, meeting_id, fingerprint.tobytes(), duration)
+        return fingerprint, duration
+
+    def _find_duplicate(self, db, meeting_id: int, filepath: str) -> int | None:
+        """Indexes the recording's fingerprint and returns the id of an already completed meeting with the same audio, if any."""
+        fingerprint, duration = self._index_fingerprint(db, meeting_id, filepath)
+        # The head alone can't tell a trimmed export or a shared intro from the same
+        # recording, so a match also needs a known, equal length.
+        if fingerprint is None or duration is None:
+            return None
+        tolerance = max(2.0, 0.01 * duration)
+
+        for candidate_id, candidate in meeting_crud.find_fingerprints(db, duration, tolerance):
+            candidate = np.frombuffer(candidate, dtype=np.uint16)
+            # Recordings shorter than the fingerprint window must match in length too.
+            if abs(len(candidate) - len(fingerprint)) > 10:
+                continue
+            if bit_error_rate(fingerprint, candidate) <= self.config.fingerprint_max_bit_error_rate:
+                return candidate_id
+        return None
+
+    def _index_streamed_upload(self, meeting_id: int, filepath: str, source):
+        """
+        Indexes a streamed upload on its own thread, so later uploads can match it.
+        It isn't matched itself: its length is only known once the body has arrived,
+        and waiting for that would hold back transcription.
+        """
+        db = self.db_session_factory()
+        try:
+            self._index_fingerprint(db, meeting_id, filepath, source)
+        except Exception as e:
+            print(f"[{meeting_id}] Fingerprinting the streamed upload failed: {e}")
+        finally:
+            db.close()
+
+    def _save_field(self, meeting_id: int, key: str, value):
+        """Persists one insight field as soon as the LLM has produced it. Runs off the pipeline thread."""
+        db = self.db_session_factory()
+        try:
+            meeting_crud.update_insight_field(db, meeting_id, key, value)
+        finally:
+            db.close()
+        self.insight_events.publish(meeting_id, key, value)
+
+    def _run_preview(self, db, meeting_id: int, filepath: str, language: str) -> threading.Thread:
+        """
+        Fast tiny-model pass whose transcript and insights stand in until the full
+        pass replaces them. The preview insights are generated on the returned
+        thread, so the full transcription can start meanwhile; join it before
+        writing the final insights.
+        """
+        meeting_crud.update_status(db, meeting_id, "transcribing")
+        print(f"[{meeting_id}] AI Pipeline: Preview transcription...")
+        result = asyncio.run(self.transcriber.preview(filepath, job_id=str(meeting_id), language=language))
+        meeting_crud.update_preview_transcript(db, meeting_id, result["transcript"])
 
-    def run(self, meeting_id: int, filepath: str):
+        def extract_insights():
+            print(f"[{meeting_id}] AI Pipeline: Preview insights...")
+            insights = self.extractor.extract(result["transcript"])
+            # Sessions aren't thread-safe, so the preview thread uses its own.
+            preview_db = self.db_session_factory()
+            try:
+                meeting_crud.update_insights(preview_db, meeting_id, insights, quality="preview")
+            finally:
+                preview_db.close()
+            print(f"[{meeting_id}] Preview ready.")
+
+        thread = threading.Thread(target=extract_insights, name=f"preview-insights-{meeting_id}", daemon=True)
+        thread.start()
+        return thread
+
+    def run(self, meeting_id: int, filepath: str, source=None):
+        """
+        Runs every stage that has not completed yet. Each stage persists its output,
+        so calling this again for a failed meeting resumes where it stopped.
+        `source` streams the upload's bytes while it is still arriving (see UploadStream).
+        """
         db = self.db_session_factory()
+        # Already claimed when scheduled by /resume.
+        with self._active_lock:
+            self.active_meetings.add(meeting_id)
+        succeeded = False
+        preview = None
+        diarizer = None
         try:
             print(f"[{meeting_id}] AI Pipeline Started.")
+            meeting = meeting_crud.get(db, meeting_id)
+
+            transcript = meeting.transcript
+            # Checked once per meeting, before any expensive stage; a resumed meeting already has its fingerprint.
+            if (self.config.fingerprint_enabled and transcript is None
+                    and not meeting_crud.has_fingerprint(db, meeting_id)):
+                duplicate_of = None
+                if source is not None:
+                    threading.Thread(target=self._index_streamed_upload, args=(meeting_id, filepath, source),
+                                     name=f"fingerprint-{meeting_id}", daemon=True).start()
+                else:
+                    duplicate_of = self._find_duplicate(db, meeting_id, filepath)
+                if duplicate_of is not None:
+                    print(f"[{meeting_id}] Same audio as meeting {duplicate_of}; reusing its results.")
+                    meeting_crud.copy_results(db, duplicate_of, meeting_id)
+                    self.vector_store.copy_transcript(duplicate_of, meeting_id)
+                    meeting_crud.update_status(db, meeting_id, "completed")
+                    succeeded = True
+                    return
+
+            # Detected once and stored, so a resumed meeting decodes its remaining chunks in the same language.
+            language = meeting.language
+            if transcript is None and language is None:
+                language = asyncio.run(self.transcriber.detect_language(
+                    filepath, job_id=str(meeting_id), model=meeting.whisper_model, source=source,
+                ))
+                meeting_crud.update_language(db, meeting_id, language)
+
+            if meeting.preview_requested and transcript is None and meeting.preview_transcript is None:
+                preview = self._run_preview(db, meeting_id, filepath, language)
+
+            if transcript is None:
+                meeting_crud.update_status(db, meeting_id, "transcribing")
+                completed = meeting_crud.get_chunks(db, meeting_id)
+                if completed:
+                    print(f"[{meeting_id}] AI Pipeline: Resuming transcription after {len(completed)} chunks...")
+                else:
+                    print(f"[{meeting_id}] AI Pipeline: Transcribing...")
+                # Checkpointed chunk indices are only valid for the chunk length they were cut with.
+                chunk_seconds = meeting.chunk_seconds
+                if chunk_seconds is None:
+                    chunk_seconds = (self.transcriber.plan_chunk_seconds(filepath, meeting.whisper_model) if source is None
+                                     else self.config.vad_max_chunk_seconds)
+                    meeting_crud.update_chunk_seconds(db, meeting_id, chunk_seconds)
+
+                def checkpoint(index: int, chunk: dict):
+                    meeting_crud.save_chunk(db, meeting_id, index, chunk)
+
+                # Diarization embeds each chunk's PCM on its own thread while Whisper decodes it.
+                if self.config.diarization_enabled:
+                    diarizer = SpeakerDiarizer(threshold=self.config.diarization_threshold,
+                                               max_speakers=self.config.diarization_max_speakers)
 
-            meeting_crud.update_status(db, meeting_id, "transcribing")
-            print(f"[{meeting_id}] AI Pipeline: Transcribing...")
-            # transcript = self.transcriber.transcribe(filepath)
-            transcript = asyncio.run(self.transcriber.transcribe(filepath))
-            meeting_crud.update_transcript(db, meeting_id, transcript)
-            print(f"[{meeting_id}] Transcription complete.")
+                result = asyncio.run(self.transcriber.transcribe(
+                    filepath, job_id=str(meeting_id), model=meeting.whisper_model, options={"language": language},
+                    completed=completed, on_chunk=checkpoint, source=source, chunk_seconds=chunk_seconds,
+                    on_audio=diarizer.add if diarizer else None,
+                ))
+                transcript = result["transcript"]
+                segments = result["segments"]
+                if diarizer:
+                    # Stored next to the transcript, so a cache hit doesn't decode the audio again just to diarize.
+                    speakers_key = DiskCache.make_key(result["cache_key"], "speakers", self.config.diarization_threshold,
+                                                      self.config.diarization_max_speakers)
+                    cached_speakers = None if diarizer.received_audio else self.transcriber.cache.get(speakers_key)
+                    if cached_speakers is not None:
+                        diarizer.close()
+                        turns = cached_speakers["turns"]
+                    else:
+                        if not diarizer.received_audio:
+                            # A transcript cached without its speakers; decode the audio for them once.
+                            for offset, chunk in self.transcriber.speech_chunks(filepath, chunk_seconds):
+                                diarizer.add(offset, chunk)
+                        turns = diarizer.finish()
+                        self.transcriber.cache.set(speakers_key, {"turns": turns})
+                    segments = {**segments, "speaker": label_segments(segments, turns)}
+                    meeting_crud.update_speakers(db, meeting_id, turns)
+                    print(f"[{meeting_id}] Diarization found {len({turn['speaker'] for turn in turns})} speakers.")
+                meeting_crud.update_transcript(db, meeting_id, transcript, segments=segments)
+                print(f"[{meeting_id}] Transcription complete.")
 
-            meeting_crud.update_status(db, meeting_id, "analyzing")
-            print(f"[{meeting_id}] AI Pipeline: Analyzing for insights...")
-            insights = self.extractor.extract(transcript)
-            meeting_crud.update_insights(db, meeting_id, insights)
-            print(f"[{meeting_id}] Insight extraction complete.")
+            if preview is not None:
+                # The preview's insights must land before the final ones replace them.
+                preview.join()
+            if meeting.insights_quality != "final":
+                meeting_crud.update_status(db, meeting_id, "analyzing")
+                print(f"[{meeting_id}] AI Pipeline: Analyzing for insights...")
+                segments = meeting_crud.get_segments(db, meeting_id)
+                labelled = None
+                if self.config.diarization_label_prompt and segments and segments.get("speaker"):
+                    labelled = labelled_transcript(segments)
+                insights = self.extractor.extract(transcript, labelled_transcript=labelled,
+                                                  on_field=lambda key, value: self._save_field(meeting_id, key, value))
+                meeting_crud.update_insights(db, meeting_id, insights, quality="final")
+                print(f"[{meeting_id}] Insight extraction complete.")
 
-            self.vector_store.add_transcript(meeting_id, transcript)
+            self.vector_store.add_transcript(meeting_id, transcript, segments=meeting_crud.get_segments(db, meeting_id))
             print(f"[{meeting_id}] Embeddings stored.")
 
+            meeting_crud.clear_chunks(db, meeting_id)
             meeting_crud.update_status(db, meeting_id, "completed")
+            succeeded = True
             print(f"[{meeting_id}] AI Pipeline Finished Successfully.")
 
         except Exception as e:
@@ -304,6 +1500,15 @@ class AIPipeline:
             meeting_crud.update_status(db, meeting_id, "failed")
             print(f"[{meeting_id}] AI Pipeline Failed: {e}")
         finally:
-            if os.path.exists(filepath):
+            if diarizer is not None:
+                diarizer.close()
+            if preview is not None:
+                preview.join()
+            # A failed meeting keeps its upload so it can be resumed later.
+            if succeeded and os.path.exists(filepath):
                 os.remove(filepath)
-            db.close()
\ No newline at end of file
+            # Every exit, including a duplicate's early return, closes any open insight streams.
+            self.insight_events.finish(meeting_id, "completed" if succeeded else "failed")
+            with self._active_lock:
+                self.active_meetings.discard(meeting_id)
+            db.close()
@@ -0,0 +1,296 @@
+import os
+import tempfile
+import threading
+
+import ffmpeg
+import numpy as np
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+# faster-whisper expects 16kHz mono float32 samples in [-1, 1].
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 4
+
+
+# Formats ffmpeg can decode front to back as bytes arrive. Containers such as MP4
+# may keep their index at the end of the file and must be fully uploaded first.
+STREAMABLE_EXTENSIONS = {".wav", ".mp3", ".ogg", ".oga", ".opus", ".flac", ".aac", ".webm", ".mka", ".mkv"}
+
+
+def probe_duration(filepath: str) -> float | None:
+    """Container-reported duration in seconds, or None when ffprobe can't tell."""
+    try:
+        return float(ffmpeg.probe(filepath)["format"]["duration"])
+    except (ffmpeg.Error, KeyError, ValueError):
+        return None
+
+
+class UploadStream:
+    """
+    Lets a reader consume an upload while it is still being written to disk. The
+    writer reports progress with `advance()` and finishes with `close()` or
+    `abort()`; iterating yields the file's bytes as soon as they are available.
+    Bytes are re-read from disk, so a slow reader never buffers the upload in memory.
+    """
+
+    def __init__(self, filepath: str, block_size: int = 1 << 16):
+        self.filepath = filepath
+        self.block_size = block_size
+        self._written = 0
+        self._closed = False
+        self._error: Exception | None = None
+        self._cond = threading.Condition()
+
+    def advance(self, nbytes: int):
+        with self._cond:
+            self._written += nbytes
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def abort(self, error: Exception):
+        with self._cond:
+            self._error = error
+            self._closed = True
+            self._cond.notify_all()
+
+    def wait(self):
+        """Blocks until the whole upload is on disk."""
+        with self._cond:
+            while not self._closed:
+                self._cond.wait()
+            if self._error:
+                raise RuntimeError(f"Upload of {self.filepath} was interrupted") from self._error
+
+    def __iter__(self):
+        position = 0
+        with open(self.filepath, "rb") as f:
+            while True:
+                with self._cond:
+                    while position >= self._written and not self._closed:
+                        self._cond.wait()
+                    if self._error:
+                        raise RuntimeError(f"Upload of {self.filepath} was interrupted") from self._error
+                    available = self._written - position
+                if available <= 0:
+                    return
+                data = f.read(min(available, self.block_size))
+                position += len(data)
+                yield data
+
+
+class SpoolSlice:
+    """
+    A `[start, end)` range of samples in a PCM spool file. It pickles as three
+    fields, so it can be sent to worker processes, and `load()` maps just that
+    range of the file into memory as a read-only NumPy array.
+    """
+    __slots__ = ("path", "start", "end")
+
+    def __init__(self, path: str, start: int, end: int):
+        self.path = path
+        self.start = start
+        self.end = end
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __getitem__(self, key: slice) -> "SpoolSlice":
+        start, stop, step = key.indices(len(self))
+        if step != 1:
+            raise ValueError("SpoolSlice only supports contiguous slices.")
+        return SpoolSlice(self.path, self.start + start, self.start + max(start, stop))
+
+    def __getstate__(self):
+        return self.path, self.start, self.end
+
+    def __setstate__(self, state):
+        self.path, self.start, self.end = state
+
+    def load(self) -> np.ndarray:
+        if not len(self):
+            return np.empty(0, dtype=np.float32)
+        return np.memmap(self.path, dtype=np.float32, mode="r", offset=self.start * BYTES_PER_SAMPLE, shape=(len(self),))
+
+
+class PCMSpool:
+    """
+    Writes decoded PCM to a scratch file as it streams past, so chunks can be
+    handed out as `SpoolSlice`s of the file instead of in-memory copies. The
+    page cache, not the heap, then holds the audio, and worker processes read
+    the same pages without copying. `close()` deletes the file.
+    """
+
+    def __init__(self, directory: str, sample_rate: int = SAMPLE_RATE):
+        os.makedirs(directory, exist_ok=True)
+        self.sample_rate = sample_rate
+        fd, self.path = tempfile.mkstemp(suffix=".f32", dir=directory)
+        self._file = os.fdopen(fd, "wb")
+        self.length = 0  # samples written so far
+
+    def tee(self, blocks):
+        """Passes `blocks` through unchanged, appending each to the spool first."""
+        for block in blocks:
+            self._file.write(block)
+            # Flushed before the block is used, so any slice handed out is already readable.
+            self._file.flush()
+            self.length += len(block)
+            yield block
+
+    def slice(self, offset_s: float, samples: int) -> SpoolSlice:
+        start = int(round(offset_s * self.sample_rate))
+        return SpoolSlice(self.path, start, min(start + samples, self.length))
+
+    def close(self):
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class PCMDecoder:
+    """Streams any audio/video file as 16kHz mono float32 PCM through an ffmpeg pipe."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+
+    def _open(self, source: str, pipe_stdin: bool = False):
+        global_args = ["-loglevel", "error"] if pipe_stdin else ["-loglevel", "error", "-nostdin"]
+        return (
+            ffmpeg
+            .input(source)
+            .output("pipe:", format="f32le", acodec="pcm_f32le", ac=1, ar=self.sample_rate)
+            .global_args(*global_args)
+            .run_async(pipe_stdin=pipe_stdin, pipe_stdout=True, pipe_stderr=True)
+        )
+
+    def stream(self, filepath: str, block_seconds: float):
+        """
+        Yields consecutive NumPy blocks of `block_seconds` of audio. Only one block
+        is held by the decoder at a time, so memory does not grow with file length.
+        """
+        yield from self._read_blocks(self._open(filepath), block_seconds, filepath)
+
+    def stream_bytes(self, source, block_seconds: float):
+        """
+        Like `stream`, but decodes encoded bytes from the iterable `source` (e.g. an
+        `UploadStream`) as they arrive instead of reading a finished file.
+        """
+        process = self._open("pipe:", pipe_stdin=True)
+        errors = []
+        feeder = threading.Thread(target=self._feed, args=(process, source, errors), daemon=True)
+        feeder.start()
+        yield from self._read_blocks(process, block_seconds, "upload stream")
+        feeder.join()
+        # If the source failed part way, ffmpeg saw a clean EOF; don't pass off a truncated decode.
+        if errors:
+            raise errors[0]
+
+    def _feed(self, process, source, errors: list):
+        try:
+            for data in source:
+                process.stdin.write(data)
+        except BrokenPipeError:
+            pass  # ffmpeg exited early; its own error is reported by the reader
+        except Exception as e:
+            errors.append(e)
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    def _read_blocks(self, process, block_seconds: float, label: str):
+        block_bytes = int(block_seconds * self.sample_rate) * BYTES_PER_SAMPLE
+        try:
+            while True:
+                data = process.stdout.read(block_bytes)
+                if not data:
+                    break
+                # A truncated stream can end mid-sample; drop the partial tail.
+                usable = len(data) - len(data) % BYTES_PER_SAMPLE
+                if usable:
+                    yield np.frombuffer(data[:usable], dtype=np.float32)
+            process.stdout.close()
+            stderr = process.stderr.read()
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to decode {label}: {stderr.decode(errors='ignore').strip()}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+
+class SpeechChunker:
+    """
+    Turns a stream of PCM blocks into speech-only chunks using faster-whisper's
+    Silero VAD. Cuts only land in silences, long non-speech stretches are dropped,
+    and no chunk is longer than `max_chunk_s`.
+    """
+
+    def __init__(self, max_chunk_s: float = 30, min_silence_ms: int = 500, max_gap_s: float = 2.0,
+                 overlap_s: float = 0.0, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.max_chunk_samples = int(max_chunk_s * sample_rate)
+        self.max_gap_samples = int(max_gap_s * sample_rate)
+        self.min_silence_samples = int(min_silence_ms * sample_rate / 1000)
+        # When a chunk has to be cut inside continuous speech, the next chunk starts
+        # this much earlier so words at the cut are decoded twice and can be stitched.
+        self.overlap_samples = int(overlap_s * sample_rate)
+        # Speech that starts right at a block edge may not be detected until more
+        # audio arrives, so a short tail is always carried into the next window.
+        self.carry_samples = sample_rate
+        self.vad_options = VadOptions(min_silence_duration_ms=min_silence_ms, max_speech_duration_s=max_chunk_s)
+
+    def _group(self, regions: list[dict]) -> list[list[int]]:
+        """Packs neighbouring speech regions into contiguous spans of bounded length."""
+        groups = []
+        for region in regions:
+            if (groups
+                    and region["start"] - groups[-1][1] <= self.max_gap_samples
+                    and region["end"] - groups[-1][0] <= self.max_chunk_samples):
+                groups[-1][1] = region["end"]
+            else:
+                groups.append([region["start"], region["end"]])
+        return groups
+
+    def chunks(self, blocks):
+        """
+        Yields `(offset_seconds, audio)` for each speech chunk found in `blocks`.
+        Consecutive chunks overlap by up to `overlap_s` where no silence separates them.
+        """
+        buffer = np.empty(0, dtype=np.float32)
+        buffer_start = 0  # absolute sample index of buffer[0]
+        preroll = 0  # leading samples kept only as overlap context, never re-detected as speech
+        previous_end = None  # absolute sample index where the last emitted chunk ended
+        blocks = iter(blocks)
+        block = next(blocks, None)
+
+        while block is not None:
+            next_block = next(blocks, None)
+            buffer = np.concatenate([buffer, block])
+            regions = get_speech_timestamps(buffer[preroll:], self.vad_options)
+            groups = [[start + preroll, end + preroll] for start, end in self._group(regions)]
+
+            # The last span may still grow with the next block unless the stream has
+            # ended or it is already followed by a full silence.
+            open_group = None
+            if next_block is not None and groups and len(buffer) - groups[-1][1] < self.min_silence_samples:
+                open_group = groups.pop()
+
+            emitted_end = preroll
+            for start, end in groups:
+                if previous_end is not None and buffer_start + start - previous_end < self.min_silence_samples:
+                    start = max(0, start - self.overlap_samples)
+                yield (buffer_start + start) / self.sample_rate, buffer[start:end].copy()
+                previous_end = buffer_start + end
+                emitted_end = end
+
+            keep_from = open_group[0] if open_group else max(emitted_end, len(buffer) - self.carry_samples)
+            preroll = min(self.overlap_samples, keep_from)
+            buffer = buffer[keep_from - preroll:]
+            buffer_start += keep_from - preroll
+            block = next_block
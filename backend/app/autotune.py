@@ -0,0 +1,150 @@
+import os
+import time
+import platform
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import ctranslate2
+import faster_whisper
+from faster_whisper import WhisperModel
+
+from .audio import SAMPLE_RATE, PCMDecoder
+from .cache import DiskCache, hash_file
+
+# Calibration clips are cut to this length; long enough to run the encoder and a
+# few decoder steps, short enough that a full sweep takes a minute or two.
+CALIBRATION_SECONDS = 15
+# Greedy decoding keeps the timing of one calibration run stable between configurations.
+CALIBRATION_DECODE_OPTIONS = {"beam_size": 1, "best_of": 1, "temperature": 0.0, "condition_on_previous_text": False}
+
+
+def synthetic_speech(seconds: float, seed: int = 0) -> np.ndarray:
+    """
+    Speech-like test audio: a gliding harmonic voice gated into syllables over
+    light noise. It is not speech: Whisper tends to emit nothing or loop on it, so
+    decoder timings measured on it are only a rough fallback for a real recording.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 140 + 40 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) * (np.sin(2 * np.pi * 0.25 * t) > -0.5)
+    audio = 0.3 * voice * syllables + 0.01 * rng.standard_normal(len(t))
+    return (audio / np.abs(audio).max()).astype(np.float32)
+
+
+class WhisperAutotuner:
+    """
+    Picks the fastest compute type, intra-op thread count and number of concurrent
+    decodes for this host by timing a short calibration clip under each candidate.
+    Calibration loads the model many times, so it is run as an explicit step
+    (`python -m app.autotune`); the server only reads the stored choice, which is
+    kept per host, model and library version.
+    """
+
+    def __init__(self, model: str, compute_types: list[str], cache_dir: str, clip_path: str | None = None):
+        self.model = model
+        self.compute_types = compute_types
+        self.clip_path = clip_path
+        self.cpu_count = os.cpu_count() or 1
+        self.cache = DiskCache(cache_dir, max_bytes=1024 * 1024)
+
+    def candidates(self) -> list[tuple[str, int, int]]:
+        """(compute_type, cpu_threads, num_workers) combinations that use every core without oversubscribing."""
+        workers = [1]
+        while workers[-1] * 2 <= self.cpu_count:
+            workers.append(workers[-1] * 2)
+        return [(compute_type, self.cpu_count // count, count) for compute_type in self.compute_types for count in workers]
+
+    def _host_signature(self) -> dict:
+        cpu_name = platform.processor()
+        try:
+            with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+                cpu_name = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu_name)
+        except OSError:
+            pass
+        return {
+            "machine": platform.machine(),
+            "cpu": cpu_name,
+            "cpu_count": self.cpu_count,
+            "ctranslate2": ctranslate2.__version__,
+            "faster_whisper": faster_whisper.__version__,
+        }
+
+    def _clip(self) -> np.ndarray:
+        if not self.clip_path:
+            print("No WHISPER_AUTOTUNE_CLIP set; calibrating on generated audio, which is not speech. "
+                  "Set it to a real recording for representative timings.")
+            return synthetic_speech(CALIBRATION_SECONDS)
+        audio = np.concatenate(list(PCMDecoder().stream(self.clip_path, block_seconds=CALIBRATION_SECONDS)))
+        return audio[:CALIBRATION_SECONDS * SAMPLE_RATE]
+
+    def _measure(self, clip: np.ndarray, compute_type: str, cpu_threads: int, num_workers: int) -> float:
+        """Seconds of audio transcribed per wall-clock second with `num_workers` decodes running at once."""
+        model = WhisperModel(self.model, device="cpu", compute_type=compute_type,
+                             cpu_threads=cpu_threads, num_workers=num_workers)
+
+        def decode(_):
+            segments, _info = model.transcribe(clip, **CALIBRATION_DECODE_OPTIONS)
+            list(segments)
+
+        decode(None)  # warm-up: first call pays for lazy allocations
+        with ThreadPoolExecutor(max_workers=num_workers) as pool:
+            start = time.perf_counter()
+            list(pool.map(decode, range(num_workers)))
+            elapsed = time.perf_counter() - start
+        return num_workers * len(clip) / SAMPLE_RATE / elapsed
+
+    def _key(self) -> str:
+        clip_id = hash_file(self.clip_path) if self.clip_path else "synthetic"
+        return DiskCache.make_key(self._host_signature(), self.model, self.candidates(), clip_id)
+
+    def cached(self) -> dict | None:
+        """The stored choice for this host, or None if calibration hasn't been run for it. Never calibrates."""
+        return self.cache.get(self._key())
+
+    def tune(self) -> dict:
+        """Returns `{"compute_type", "cpu_threads", "num_workers", "throughput"}`, calibrating only on a cache miss."""
+        key = self._key()
+        cached = self.cache.get(key)
+        if cached is not None:
+            print(f"Using cached Whisper tuning: {cached['compute_type']}, "
+                  f"{cached['num_workers']} workers x {cached['cpu_threads']} threads")
+            return cached
+
+        clip = self._clip()
+        print(f"Calibrating Whisper model {self.model} on {self.cpu_count} cores...")
+        best = None
+        for compute_type, cpu_threads, num_workers in self.candidates():
+            try:
+                throughput = self._measure(clip, compute_type, cpu_threads, num_workers)
+            except (ValueError, RuntimeError) as e:
+                # CTranslate2 rejects compute types the CPU has no kernels for.
+                print(f"  {compute_type}, {num_workers} workers x {cpu_threads} threads: unsupported ({e})")
+                continue
+            print(f"  {compute_type}, {num_workers} workers x {cpu_threads} threads: {throughput:.2f}x real time")
+            if best is None or throughput > best["throughput"]:
+                best = {"compute_type": compute_type, "cpu_threads": cpu_threads,
+                        "num_workers": num_workers, "throughput": round(throughput, 3)}
+
+        if best is None:
+            raise RuntimeError(f"No candidate compute type could load {self.model}: {self.compute_types}")
+        print(f"Selected {best['compute_type']}, {best['num_workers']} workers x {best['cpu_threads']} threads")
+        self.cache.set(key, best)
+        return best
+
+
+def main():
+    """Calibrates for the configured model and stores the result for the server to pick up."""
+    from .ai_processing import AIServiceConfig
+
+    config = AIServiceConfig()
+    WhisperAutotuner(
+        config.whisper_model_path, config.whisper_autotune_compute_types,
+        config.whisper_autotune_cache_dir, clip_path=config.whisper_autotune_clip,
+    ).tune()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+
+def hash_file(filepath: str, block_size: int = 1 << 20) -> str:
+    """Returns the SHA-256 of a file's bytes, read in blocks so large uploads stay out of memory."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    A directory of JSON entries with size-bounded LRU eviction. An entry's
+    modification time is when it was written and its access time when it was
+    last read; the least recently used entries are removed whenever the directory
+    grows beyond `max_bytes`, and entries older than `ttl_seconds` (if set) are
+    treated as misses.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float | None = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Builds a stable key from any JSON-serialisable parts."""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> dict | None:
+        path = self._path(key)
+        with self._lock:
+            try:
+                written_at = os.stat(path).st_mtime
+                if self.ttl_seconds and time.time() - written_at > self.ttl_seconds:
+                    self._remove(path)
+                    return None
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+                # Set the access time explicitly; filesystems mounted noatime won't.
+                os.utime(path, (time.time(), written_at))
+                return value
+            except FileNotFoundError:
+                return None
+            except (OSError, json.JSONDecodeError):
+                # A corrupt entry is treated as a miss and dropped.
+                self._remove(path)
+                return None
+
+    def set(self, key: str, value: dict):
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            # Atomic rename so concurrent readers never see a half-written entry.
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+
+class LLMResponseCache(DiskCache):
+    """
+    Caches LLM responses on disk, keyed by model, prompt template version,
+    generation options and a hash of the prompt, so repeating an identical
+    request is answered without calling the model.
+    """
+
+    @staticmethod
+    def request_key(model: str, template_version: str, options: dict, prompt: str) -> str:
+        return DiskCache.make_key(model, template_version, options, hashlib.sha256(prompt.encode()).hexdigest())
@@ -9,8 +9,11 @@ class MeetingCRUD:
     def get_multi(self, db: Session, skip: int = 0, limit: int = 100) -> list[models.Meeting]:
         return db.query(models.Meeting).order_by(models.Meeting.created_at.desc()).offset(skip).limit(limit).all()
 
-    def create(self, db: Session, filename: str) -> models.Meeting:
-        db_meeting = models.Meeting(filename=filename, status="processing")
+    def create(self, db: Session, filename: str, upload_path: str | None = None,
+               whisper_model: str | None = None, preview: bool = False,
+               language: str | None = None) -> models.Meeting:
+        db_meeting = models.Meeting(filename=filename, status="processing", upload_path=upload_path,
+                                    whisper_model=whisper_model, preview_requested=preview, language=language)
         db.add(db_meeting)
         db.commit()
         db.refresh(db_meeting)
@@ -24,16 +27,32 @@ class MeetingCRUD:
             db.refresh(db_meeting)
         return db_meeting
 
-    def update_transcript(self, db: Session, meeting_id: int, transcript: str):
+    def update_transcript(self, db: Session, meeting_id: int, transcript: str, segments: dict | None = None):
         db_meeting = self.get(db, meeting_id)
         if db_meeting:
             db_meeting.transcript = transcript
+            if segments is not None:
+                db_meeting.segments = json.dumps(segments, separators=(",", ":"))
             db.commit()
         return db_meeting
 
-    def update_insights(self, db: Session, meeting_id: int, insights: dict):
+    def update_preview_transcript(self, db: Session, meeting_id: int, transcript: str):
         db_meeting = self.get(db, meeting_id)
         if db_meeting:
+            db_meeting.preview_transcript = transcript
+            db.commit()
+        return db_meeting
+
+    def get_segments(self, db: Session, meeting_id: int) -> dict | None:
+        db_meeting = self.get(db, meeting_id)
+        if db_meeting is None or not db_meeting.segments:
+            return None
+        return json.loads(db_meeting.segments)
+
+    def update_insights(self, db: Session, meeting_id: int, insights: dict, quality: str = "final"):
+        db_meeting = self.get(db, meeting_id)
+        if db_meeting:
+            db_meeting.insights_quality = quality
             db_meeting.summary = insights.get("summary")
             db_meeting.action_items = json.dumps(insights.get("action_items", []))
             db_meeting.decisions = json.dumps(insights.get("decisions", []))
@@ -43,5 +62,105 @@ class MeetingCRUD:
             db.commit()
         return db_meeting
 
+    # Insight fields that are stored as JSON rather than plain text.
+    JSON_INSIGHT_FIELDS = ("action_items", "decisions", "keywords", "participants")
+
+    def update_insight_field(self, db: Session, meeting_id: int, field: str, value):
+        """Stores one insight field while the rest are still being generated."""
+        db_meeting = self.get(db, meeting_id)
+        if db_meeting is None or field not in self.JSON_INSIGHT_FIELDS + ("summary", "sentiment"):
+            return db_meeting
+        if field in self.JSON_INSIGHT_FIELDS or not isinstance(value, str):
+            value = json.dumps(value)
+        setattr(db_meeting, field, value)
+        db_meeting.insights_quality = "partial"
+        db.commit()
+        return db_meeting
+
+    def update_speakers(self, db: Session, meeting_id: int, turns: list[dict]):
+        db_meeting = self.get(db, meeting_id)
+        if db_meeting:
+            db_meeting.speakers = json.dumps(turns, separators=(",", ":"))
+            db.commit()
+        return db_meeting
+
+    def update_language(self, db: Session, meeting_id: int, language: str):
+        db_meeting = self.get(db, meeting_id)
+        if db_meeting:
+            db_meeting.language = language
+            db.commit()
+        return db_meeting
+
+    def save_fingerprint(self, db: Session, meeting_id: int, fingerprint: bytes, duration: float | None):
+        db.add(models.AudioFingerprint(meeting_id=meeting_id, fingerprint=fingerprint, duration=duration))
+        db.commit()
+
+    def has_fingerprint(self, db: Session, meeting_id: int) -> bool:
+        return db.query(models.AudioFingerprint.id).filter(models.AudioFingerprint.meeting_id == meeting_id).first() is not None
+
+    def find_fingerprints(self, db: Session, duration: float, tolerance: float) -> list[tuple[int, bytes]]:
+        """`(meeting_id, fingerprint)` of completed meetings whose known duration is within `tolerance` seconds."""
+        return db.query(models.AudioFingerprint.meeting_id, models.AudioFingerprint.fingerprint).join(
+            models.Meeting, models.Meeting.id == models.AudioFingerprint.meeting_id
+        ).filter(
+            models.Meeting.status == "completed", models.Meeting.duplicate_of.is_(None),
+            models.AudioFingerprint.duration.between(duration - tolerance, duration + tolerance),
+        ).all()
+
+    def copy_results(self, db: Session, source_id: int, target_id: int):
+        """Gives `target_id` the transcript, speakers and insights of `source_id`."""
+        source, target = self.get(db, source_id), self.get(db, target_id)
+        for field in ("transcript", "segments", "speakers", "language", "summary", "action_items", "decisions",
+                      "keywords", "participants", "sentiment", "insights_quality"):
+            setattr(target, field, getattr(source, field))
+        target.duplicate_of = source_id
+        db.commit()
+        return target
+
+    def update_chunk_seconds(self, db: Session, meeting_id: int, chunk_seconds: float):
+        db_meeting = self.get(db, meeting_id)
+        if db_meeting:
+            db_meeting.chunk_seconds = chunk_seconds
+            db.commit()
+        return db_meeting
+
+    def save_chunk(self, db: Session, meeting_id: int, chunk_index: int, chunk: dict):
+        db_chunk = db.query(models.TranscriptChunk).filter(
+            models.TranscriptChunk.meeting_id == meeting_id,
+            models.TranscriptChunk.chunk_index == chunk_index,
+        ).first()
+        if db_chunk is None:
+            db_chunk = models.TranscriptChunk(meeting_id=meeting_id, chunk_index=chunk_index)
+            db.add(db_chunk)
+        db_chunk.offset = chunk["offset"]
+        db_chunk.duration = chunk["duration"]
+        db_chunk.segments = json.dumps(chunk["segments"], separators=(",", ":"))
+        db.commit()
+
+    def get_chunks(self, db: Session, meeting_id: int) -> dict[int, dict]:
+        rows = db.query(models.TranscriptChunk).filter(models.TranscriptChunk.meeting_id == meeting_id).all()
+        return {
+            row.chunk_index: {"offset": row.offset, "duration": row.duration, "segments": json.loads(row.segments)}
+            for row in rows
+        }
+
+    def get_unfinished_uploads(self, db: Session, before) -> list[models.Meeting]:
+        """Meetings created before `before` that never completed but still keep their upload."""
+        return db.query(models.Meeting).filter(
+            models.Meeting.status != "completed", models.Meeting.upload_path.isnot(None),
+            models.Meeting.created_at < before,
+        ).all()
+
+    def clear_upload_path(self, db: Session, meeting_id: int):
+        db_meeting = self.get(db, meeting_id)
+        if db_meeting:
+            db_meeting.upload_path = None
+            db.commit()
+        return db_meeting
+
+    def clear_chunks(self, db: Session, meeting_id: int):
+        db.query(models.TranscriptChunk).filter(models.TranscriptChunk.meeting_id == meeting_id).delete()
+        db.commit()
+
 # --- Global Instance ---
 meeting_crud = MeetingCRUD()
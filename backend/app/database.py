@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -15,6 +15,25 @@ class DatabaseManager:
         """Creates database tables."""
         Base.metadata.create_all(bind=self.engine)
 
+    def add_missing_columns(self):
+        """
+        Adds model columns that an existing database predates. `create_all` only
+        creates missing tables, so columns added to a model later are added here,
+        as nullable columns without constraints.
+        """
+        existing_tables = inspect(self.engine).get_table_names()
+        with self.engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+                existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    print(f"Adding column {table.name}.{column.name} to the existing database.")
+                    connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
     def get_db(self):
         """Dependency generator for FastAPI routes."""
         db = self.SessionLocal()
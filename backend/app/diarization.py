@@ -0,0 +1,165 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .audio import SAMPLE_RATE
+
+# 25 ms frames every 10 ms, the usual framing for speech features.
+FRAME_SAMPLES = 400
+HOP_SAMPLES = 160
+FFT_SIZE = 512
+MEL_BANDS = 40
+
+
+def _mel_filterbank(bands: int = MEL_BANDS, fft_size: int = FFT_SIZE, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Triangular filters evenly spaced on the mel scale, shaped `(bands, fft_size // 2 + 1)`."""
+    to_mel = lambda hz: 2595 * np.log10(1 + hz / 700)
+    to_hz = lambda mel: 700 * (10 ** (mel / 2595) - 1)
+    edges = to_hz(np.linspace(to_mel(20), to_mel(sample_rate / 2), bands + 2))
+    bins = np.fft.rfftfreq(fft_size, 1 / sample_rate)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0, np.minimum(rising, falling))
+
+
+def label_segments(segments: dict, turns: list[dict]) -> list[str | None]:
+    """The speaker overlapping each transcript segment the most, or None where no turn overlaps it."""
+    labels = []
+    for start, end in zip(segments["start"], segments["end"]):
+        overlaps = {}
+        for turn in turns:
+            overlap = min(end, turn["end"]) - max(start, turn["start"])
+            if overlap > 0:
+                overlaps[turn["speaker"]] = overlaps.get(turn["speaker"], 0) + overlap
+        labels.append(max(overlaps, key=overlaps.get) if overlaps else None)
+    return labels
+
+
+def labelled_transcript(segments: dict) -> str:
+    """Transcript text with one line per speaker turn, e.g. `SPEAKER_1: ...`."""
+    lines = []
+    for speaker, text in zip(segments["speaker"], segments["text"]):
+        speaker = speaker or "UNKNOWN"
+        if lines and lines[-1][0] == speaker:
+            lines[-1][1].append(text)
+        else:
+            lines.append((speaker, [text]))
+    return "\n".join(f"{speaker}: {' '.join(texts)}" for speaker, texts in lines)
+
+
+class SpeakerDiarizer:
+    """
+    Labels who speaks when, on CPU and without a decode pass of its own. The
+    transcription stage hands it each speech chunk as it is decoded; a background
+    thread embeds overlapping windows of the chunk (mean and spread of its log-mel
+    spectrum) while Whisper works. `finish()` clusters the embeddings with
+    agglomerative clustering and returns speaker turns.
+    """
+
+    def __init__(self, threshold: float = 0.5, max_speakers: int = 8, window_s: float = 1.5, hop_s: float = 0.75,
+                 max_cluster_items: int = 400):
+        self.threshold = threshold
+        self.max_speakers = max_speakers
+        self.window_frames = int(window_s * SAMPLE_RATE / HOP_SAMPLES)
+        self.hop_frames = int(hop_s * SAMPLE_RATE / HOP_SAMPLES)
+        # Clustering is cubic in the number of windows; longer meetings are
+        # clustered on an even sample and the remaining windows join the nearest cluster.
+        self.max_cluster_items = max_cluster_items
+        self.filterbank = _mel_filterbank()
+        self.window = np.hanning(FRAME_SAMPLES).astype(np.float32)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diarization")
+        self._futures = []
+        self._covered_until = 0  # absolute sample index up to which audio has been queued
+
+    @property
+    def received_audio(self) -> bool:
+        return bool(self._futures)
+
+    def add(self, offset_s: float, audio: np.ndarray):
+        """Queues a speech chunk starting `offset_s` into the recording. Audio already seen (chunk overlap) is skipped."""
+        start = int(round(offset_s * SAMPLE_RATE))
+        skip = max(0, self._covered_until - start)
+        self._covered_until = max(self._covered_until, start + len(audio))
+        if len(audio) - skip >= FRAME_SAMPLES + self.window_frames * HOP_SAMPLES:
+            self._futures.append(self._executor.submit(self._embed, start + skip, audio[skip:]))
+
+    def close(self):
+        """Stops the embedding thread; `finish()` does this itself, call it when abandoning the diarizer."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _log_mel(self, audio: np.ndarray) -> np.ndarray:
+        frames = 1 + (len(audio) - FRAME_SAMPLES) // HOP_SAMPLES
+        index = np.arange(FRAME_SAMPLES)[None, :] + HOP_SAMPLES * np.arange(frames)[:, None]
+        power = np.abs(np.fft.rfft(audio[index] * self.window, n=FFT_SIZE)) ** 2
+        return np.log(power @ self.filterbank.T + 1e-10)
+
+    def _embed(self, start: int, audio: np.ndarray) -> list[tuple[float, float, np.ndarray]]:
+        """`(start_s, end_s, embedding)` for each analysis window of one chunk."""
+        features = self._log_mel(audio)
+        windows = []
+        for frame in range(0, len(features) - self.window_frames + 1, self.hop_frames):
+            window = features[frame:frame + self.window_frames]
+            begin = (start + frame * HOP_SAMPLES) / SAMPLE_RATE
+            end = begin + self.window_frames * HOP_SAMPLES / SAMPLE_RATE
+            windows.append((begin, end, np.concatenate([window.mean(axis=0), window.std(axis=0)])))
+        return windows
+
+    def _agglomerate(self, embeddings: np.ndarray) -> np.ndarray:
+        """Average-linkage clustering on cosine distance; returns a cluster id per row."""
+        distance = 1 - embeddings @ embeddings.T
+        np.fill_diagonal(distance, np.inf)
+        sizes = np.ones(len(embeddings))
+        labels = np.arange(len(embeddings))
+        clusters = len(embeddings)
+        while clusters > 1:
+            i, j = np.unravel_index(np.argmin(distance), distance.shape)
+            if distance[i, j] > self.threshold and clusters <= self.max_speakers:
+                break
+            merged = (sizes[i] * distance[i] + sizes[j] * distance[j]) / (sizes[i] + sizes[j])
+            distance[i], distance[:, i] = merged, merged
+            distance[i, i] = np.inf
+            distance[j], distance[:, j] = np.inf, np.inf
+            sizes[i] += sizes[j]
+            labels[labels == j] = i
+            clusters -= 1
+        return labels
+
+    def _cluster(self, embeddings: np.ndarray) -> np.ndarray:
+        if len(embeddings) <= self.max_cluster_items:
+            return self._agglomerate(embeddings)
+        sample = np.linspace(0, len(embeddings) - 1, self.max_cluster_items).astype(int)
+        sample_labels = self._agglomerate(embeddings[sample])
+        ids = np.unique(sample_labels)
+        centroids = np.stack([embeddings[sample][sample_labels == cluster].mean(axis=0) for cluster in ids])
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-10
+        return ids[np.argmax(embeddings @ centroids.T, axis=1)]
+
+    def finish(self) -> list[dict]:
+        """Waits for queued chunks and returns `[{"start", "end", "speaker"}]` turns in time order."""
+        try:
+            windows = [window for future in self._futures for window in future.result()]
+        finally:
+            self.close()
+        if not windows:
+            return []
+
+        embeddings = np.stack([embedding for _, _, embedding in windows])
+        # Standardise each feature over the meeting, so distances reflect differences between voices.
+        embeddings = (embeddings - embeddings.mean(axis=0)) / (embeddings.std(axis=0) + 1e-10)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-10
+        labels = self._cluster(embeddings)
+
+        names, turns = {}, []
+        hop_s = self.hop_frames * HOP_SAMPLES / SAMPLE_RATE
+        for (start, end, _), label in zip(windows, labels):
+            speaker = names.setdefault(label, f"SPEAKER_{len(names) + 1}")
+            if turns and turns[-1]["speaker"] == speaker and start - turns[-1]["end"] <= hop_s:
+                turns[-1]["end"] = round(end, 2)
+            else:
+                if turns and turns[-1]["end"] > start:
+                    # Windows overlap; split the shared stretch between the two turns.
+                    turns[-1]["end"] = round(start + (turns[-1]["end"] - start) / 2, 2)
+                    start = turns[-1]["end"]
+                turns.append({"start": round(start, 2), "end": round(end, 2), "speaker": speaker})
+        return turns
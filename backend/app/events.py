@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+
+class InsightBroadcaster:
+    """
+    Fans insight fields out to listeners as the LLM produces them. The pipeline
+    publishes from its worker threads; each listener is an asyncio queue on the
+    web server's loop. Fields already published for a meeting are replayed to
+    listeners that subscribe late, until the meeting's stream is finished.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fields: dict[int, dict] = {}
+        self._listeners: dict[int, list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def subscribe(self, meeting_id: int) -> tuple[asyncio.Queue, dict]:
+        """Returns a queue of `(event, data)` tuples plus the fields published so far. Call from the event loop."""
+        queue = asyncio.Queue()
+        with self._lock:
+            self._listeners.setdefault(meeting_id, []).append((asyncio.get_running_loop(), queue))
+            return queue, dict(self._fields.get(meeting_id, {}))
+
+    def unsubscribe(self, meeting_id: int, queue: asyncio.Queue):
+        with self._lock:
+            listeners = [entry for entry in self._listeners.get(meeting_id, []) if entry[1] is not queue]
+            if listeners:
+                self._listeners[meeting_id] = listeners
+            else:
+                self._listeners.pop(meeting_id, None)
+
+    def _send(self, meeting_id: int, event: str, data):
+        for loop, queue in self._listeners.get(meeting_id, []):
+            loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    def publish(self, meeting_id: int, field: str, value):
+        with self._lock:
+            self._fields.setdefault(meeting_id, {})[field] = value
+            self._send(meeting_id, "field", {"field": field, "value": value})
+
+    def finish(self, meeting_id: int, status: str):
+        """Ends the meeting's stream with a final `done` event; `status` is "completed" or "failed"."""
+        with self._lock:
+            self._fields.pop(meeting_id, None)
+            self._send(meeting_id, "done", {"status": status})
@@ -0,0 +1,73 @@
+import json
+
+
+class StreamingJSONObject:
+    """
+    Parses a JSON object that arrives in fragments, such as an LLM's streamed
+    output. `feed()` returns each top-level `(key, value)` pair as soon as its
+    value is complete, so callers can use early fields while later ones are still
+    being generated. Only the member currently being received is buffered, and
+    each fragment is scanned once, so parsing is linear in the response length.
+    """
+
+    def __init__(self):
+        self.fields: dict = {}
+        self.complete = False  # True once the closing brace has been seen
+        self.skipped = False  # True if any member was malformed and dropped
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._member: list[str] = []  # fragments of the member being received
+
+    def feed(self, text: str) -> list[tuple[str, object]]:
+        completed = []
+        start = 0  # where the current member's part of `text` begins
+        for i, char in enumerate(text):
+            if self.complete:
+                break
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if self._depth == 0:
+                # Anything before the opening brace (e.g. whitespace) is ignored.
+                if char == "{":
+                    self._depth = 1
+                    start = i + 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed += self._end_member(text[start:i])
+                    self.complete = True
+            elif char == "," and self._depth == 1:
+                completed += self._end_member(text[start:i])
+                start = i + 1
+
+        if self._depth > 0 and not self.complete:
+            self._member.append(text[start:])
+        return completed
+
+    def _end_member(self, tail: str) -> list[tuple[str, object]]:
+        member = "".join(self._member) + tail
+        self._member = []
+        if not member.strip():
+            return []
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError as e:
+            # One malformed member doesn't cost the fields around it.
+            print(f"Skipping malformed JSON member: {e}")
+            self.skipped = True
+            return []
+        self.fields.update(parsed)
+        return list(parsed.items())
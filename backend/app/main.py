@@ -1,12 +1,26 @@
 import os, sys
 import uuid
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Depends
+import json
+import asyncio
+import threading
+from fastapi import FastAPI, File, Form, Request, UploadFile, HTTPException, BackgroundTasks, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from . import schemas
 from .database import db_manager, Base
 from .crud import meeting_crud
-from .ai_processing import AIPipeline, VectorStoreService
+from .ai_processing import SUPPORTED_LANGUAGES, AIPipeline, VectorStoreService
+from .audio import STREAMABLE_EXTENSIONS, UploadStream
+
+# Uploads are copied to disk in pieces of this size instead of being read whole.
+UPLOAD_READ_SIZE = 1024 * 1024
+# Idle SSE connections get a comment this often so proxies don't close them.
+SSE_KEEPALIVE_SECONDS = 15
+INSIGHT_FIELDS = ("participants", "summary", "action_items", "decisions", "keywords", "sentiment")
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 class AppCreator:
     """
@@ -25,13 +39,22 @@ class AppCreator:
         self._create_db_tables()
         self._configure_middleware()
         self._create_upload_dir()
+        self.ai_pipeline.remove_stale_uploads()
+        self._register_shutdown()
 
         # --- Register API Routes ---
         self._register_routes()
 
     def _create_db_tables(self):
-        """Creates database tables if they don't exist."""
+        """Creates database tables if they don't exist, and adds columns newer than an existing database."""
         Base.metadata.create_all(bind=db_manager.engine)
+        db_manager.add_missing_columns()
+
+    def _register_shutdown(self):
+        """Tears down the pooled Ollama client and its loop thread when the server stops."""
+        @self.app.on_event("shutdown")
+        def close_ollama_client():
+            self.ai_pipeline.ollama.close()
 
     def _configure_middleware(self):
         """Sets up CORS middleware for the application."""
@@ -55,24 +78,88 @@ class AppCreator:
         async def upload_file(
                 background_tasks: BackgroundTasks,
                 file: UploadFile = File(...),
+                model: str | None = Form(None),
+                preview: bool = Form(False),
+                language: str | None = Form(None),
                 db: Session = Depends(db_manager.get_db)
         ):
             print("UPLOAD FILE HIT", file.filename, file.content_type)
             if not file.content_type.startswith(("audio/", "video/")):
                 raise HTTPException(status_code=400, detail="Invalid file type.")
+            if model is not None and model not in self.ai_pipeline.config.whisper_models:
+                raise HTTPException(status_code=400, detail=f"Unknown Whisper model '{model}'.")
+            if language is not None and language not in SUPPORTED_LANGUAGES:
+                raise HTTPException(status_code=400, detail=f"Unsupported language '{language}'.")
 
             file_path = os.path.join("uploads", f"{uuid.uuid4()}{os.path.splitext(file.filename)[1]}")
             with open(file_path, "wb") as buffer:
-                buffer.write(await file.read())
+                while data := await file.read(UPLOAD_READ_SIZE):
+                    buffer.write(data)
 
-            meeting = meeting_crud.create(db=db, filename=file.filename)
+            meeting = meeting_crud.create(db=db, filename=file.filename, upload_path=file_path, whisper_model=model,
+                                         preview=preview, language=language)
 
             # Use the pipeline instance from the class
             background_tasks.add_task(self.ai_pipeline.run, meeting_id=meeting.id, filepath=file_path)
 
             return {"id": meeting.id, "status": meeting.status, "filename": meeting.filename}
 
-        @self.app.get("/meetings", response_model=list[schemas.Meeting])
+        @self.app.post("/upload/stream", response_model=schemas.MeetingStatus, status_code=202)
+        async def upload_stream(
+                request: Request,
+                background_tasks: BackgroundTasks,
+                filename: str,
+                model: str | None = None,
+                language: str | None = None,
+                db: Session = Depends(db_manager.get_db)
+        ):
+            """
+            Accepts the recording as the raw request body. For formats ffmpeg can decode
+            front to back, transcription starts while the bytes are still arriving;
+            other formats are processed once the upload completes.
+            """
+            content_type = request.headers.get("content-type", "")
+            if not content_type.startswith(("audio/", "video/")):
+                raise HTTPException(status_code=400, detail="Invalid file type.")
+            if model is not None and model not in self.ai_pipeline.config.whisper_models:
+                raise HTTPException(status_code=400, detail=f"Unknown Whisper model '{model}'.")
+            if language is not None and language not in SUPPORTED_LANGUAGES:
+                raise HTTPException(status_code=400, detail=f"Unsupported language '{language}'.")
+
+            extension = os.path.splitext(filename)[1].lower()
+            file_path = os.path.join("uploads", f"{uuid.uuid4()}{extension}")
+            meeting = meeting_crud.create(db=db, filename=filename, upload_path=file_path, whisper_model=model,
+                                         language=language)
+
+            with open(file_path, "wb") as buffer:
+                stream = None
+                if extension in STREAMABLE_EXTENSIONS:
+                    stream = UploadStream(file_path)
+                    threading.Thread(
+                        target=self.ai_pipeline.run,
+                        kwargs={"meeting_id": meeting.id, "filepath": file_path, "source": stream},
+                        daemon=True,
+                    ).start()
+                try:
+                    async for data in request.stream():
+                        buffer.write(data)
+                        # Flush so the pipeline thread can read these bytes back from disk.
+                        buffer.flush()
+                        if stream:
+                            stream.advance(len(data))
+                except Exception as e:
+                    if stream:
+                        stream.abort(e)
+                    raise
+
+            if stream:
+                stream.close()
+            else:
+                background_tasks.add_task(self.ai_pipeline.run, meeting_id=meeting.id, filepath=file_path)
+
+            return {"id": meeting.id, "status": meeting.status, "filename": meeting.filename}
+
+        @self.app.get("/meetings", response_model=list[schemas.MeetingListItem])
         def get_all_meetings(skip: int = 0, limit: int = 100, db: Session = Depends(db_manager.get_db)):
             return meeting_crud.get_multi(db, skip=skip, limit=limit)
 
@@ -90,6 +177,72 @@ class AppCreator:
                 raise HTTPException(status_code=404, detail="Meeting not found")
             return {"id": db_meeting.id, "status": db_meeting.status, "filename": db_meeting.filename}
 
+        @self.app.get("/meetings/{meeting_id}/insights/stream")
+        async def stream_insights(meeting_id: int, request: Request, db: Session = Depends(db_manager.get_db)):
+            """
+            Server-sent events for a meeting's insights: a `field` event with
+            `{"field", "value"}` for each insight field as the LLM completes it, then
+            a `done` event with `{"status"}`. Fields generated before the client
+            connected are sent first.
+            """
+            db_meeting = meeting_crud.get(db, meeting_id=meeting_id)
+            if db_meeting is None:
+                raise HTTPException(status_code=404, detail="Meeting not found")
+
+            # Subscribe before reading the row, so a finish in between can't be missed.
+            events = self.ai_pipeline.insight_events
+            queue, published = events.subscribe(meeting_id)
+            meeting = schemas.Meeting.model_validate(db_meeting)
+            # A pipeline is running, or queued ("processing"): an upload's pipeline only
+            # starts once its response has been sent. A row left mid-stage by a restart isn't live.
+            live = meeting.insights_quality != "final" and (
+                meeting_id in self.ai_pipeline.active_meetings or meeting.status == "processing")
+            db.close()
+
+            async def event_stream():
+                try:
+                    if not live:
+                        # Nothing is being generated; send what is stored and stop.
+                        for field, value in meeting.model_dump(include=set(INSIGHT_FIELDS)).items():
+                            yield sse_event("field", {"field": field, "value": value})
+                        yield sse_event("done", {"status": meeting.status})
+                        return
+
+                    for field, value in published.items():
+                        yield sse_event("field", {"field": field, "value": value})
+                    while not await request.is_disconnected():
+                        try:
+                            event, data = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                        except asyncio.TimeoutError:
+                            yield ": keep-alive\n\n"
+                            continue
+                        yield sse_event(event, data)
+                        if event == "done":
+                            return
+                finally:
+                    events.unsubscribe(meeting_id, queue)
+
+            return StreamingResponse(event_stream(), media_type="text/event-stream",
+                                     headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        @self.app.post("/meetings/{meeting_id}/resume", response_model=schemas.MeetingStatus, status_code=202)
+        def resume_meeting(meeting_id: int, background_tasks: BackgroundTasks, db: Session = Depends(db_manager.get_db)):
+            db_meeting = meeting_crud.get(db, meeting_id=meeting_id)
+            if db_meeting is None:
+                raise HTTPException(status_code=404, detail="Meeting not found")
+            # "processing" means a pipeline is already queued for it.
+            if db_meeting.status in ("completed", "processing"):
+                raise HTTPException(status_code=409, detail="Meeting is not in a resumable state.")
+            if not db_meeting.upload_path or not os.path.exists(db_meeting.upload_path):
+                raise HTTPException(status_code=410, detail="The original upload is no longer available.")
+            # Claimed now, not when the background task starts, so a second request can't schedule it again.
+            if not self.ai_pipeline.claim(meeting_id):
+                raise HTTPException(status_code=409, detail="Meeting is not in a resumable state.")
+
+            db_meeting = meeting_crud.update_status(db, meeting_id, "processing")
+            background_tasks.add_task(self.ai_pipeline.run, meeting_id=meeting_id, filepath=db_meeting.upload_path)
+            return {"id": db_meeting.id, "status": db_meeting.status, "filename": db_meeting.filename}
+
         @self.app.post("/search/{meeting_id}", response_model=schemas.SearchResult)
         def search_in_meeting(meeting_id: int, query: schemas.SearchQuery, db: Session = Depends(db_manager.get_db)):
             db_meeting = meeting_crud.get(db, meeting_id)
@@ -99,8 +252,15 @@ class AppCreator:
                 raise HTTPException(status_code=400, detail="Meeting is still processing.")
 
             # Use the vector_store from the pipeline instance
-            answer = self.ai_pipeline.vector_store.search(meeting_id, query.query)
-            return {"answer": answer}
+            return self.ai_pipeline.vector_store.search(meeting_id, query.query)
+
+        @self.app.get("/transcription/stats", response_model=schemas.TranscriptionStats)
+        def get_transcription_stats():
+            return self.ai_pipeline.transcriber.stats()
+
+        @self.app.get("/ollama/stats", response_model=schemas.OllamaStats)
+        def get_ollama_stats():
+            return self.ai_pipeline.ollama.stats()
 
         @self.app.get("/", include_in_schema=False)
         def root():
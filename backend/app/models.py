@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, Float, ForeignKey, LargeBinary, UniqueConstraint
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -10,6 +10,7 @@ class Meeting(Base):
     status = Column(String, default="processing")  # processing, completed, failed
 
     transcript = Column(Text, nullable=True)
+    segments = Column(Text, nullable=True)  # JSON string of {"start": [...], "end": [...], "text": [...]}
     summary = Column(Text, nullable=True)
 
     action_items = Column(Text, nullable=True)  # JSON string of a list of objects
@@ -18,5 +19,40 @@ class Meeting(Base):
     keywords = Column(Text, nullable=True) # JSON string of [{"keyword": "str", "count": int}]  # JSON string of a list of strings
     sentiment = Column(String, nullable=True)  # e.g., "Positive", "Neutral", "Negative"
     participants = Column(Text, nullable=True)  # JSON string of a list of strings
+    speakers = Column(Text, nullable=True)  # JSON string of [{"start": float, "end": float, "speaker": "SPEAKER_1"}]
+
+    # Two-pass mode: a rough tiny-model transcript first, then the full-quality one.
+    preview_requested = Column(Boolean, default=False)
+    preview_transcript = Column(Text, nullable=True)
+    insights_quality = Column(String, nullable=True)  # "preview", "partial" while fields stream in, then "final"
+
+    whisper_model = Column(String, nullable=True)  # None means the configured default model
+    language = Column(String, nullable=True)  # Whisper language code, given at upload or detected once
+    chunk_seconds = Column(Float, nullable=True)  # Maximum chunk length chosen for this recording
+    upload_path = Column(String, nullable=True)  # Kept until the pipeline completes so it can resume
+    duplicate_of = Column(Integer, ForeignKey("meetings.id"), nullable=True)  # Meeting whose results were reused
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class TranscriptChunk(Base):
+    """Checkpointed Whisper output for one chunk of a meeting that is still being transcribed."""
+    __tablename__ = "transcript_chunks"
+    __table_args__ = (UniqueConstraint("meeting_id", "chunk_index"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id"), index=True)
+    chunk_index = Column(Integer)
+    offset = Column(Float)  # Seconds from the start of the recording
+    duration = Column(Float)  # Seconds of audio in the chunk, including any overlap with the previous one
+    segments = Column(Text)  # JSON string of segments with times relative to `offset`
+
+
+class AudioFingerprint(Base):
+    """Acoustic fingerprint of the start of a meeting's recording, used to spot re-uploads of the same audio."""
+    __tablename__ = "audio_fingerprints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id"), unique=True, index=True)
+    duration = Column(Float, nullable=True, index=True)  # Seconds, when the container reports it
+    fingerprint = Column(LargeBinary)  # uint16 sub-fingerprints, one per 100 ms
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import threading
+
+import httpx
+
+
+class OllamaClient:
+    """
+    One pooled `httpx.AsyncClient` shared by every Ollama call in the process. It
+    lives on its own event loop thread, so connections are kept alive and reused
+    across requests from any thread. Synchronous callers use `run()`; the
+    coroutines it schedules can fan out concurrently.
+    """
+
+    def __init__(self, max_connections: int = 8, keepalive_seconds: float = 60,
+                 connect_timeout: float = 5, read_timeout: float = 600):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="ollama-client", daemon=True)
+        self._thread.start()
+        self.max_connections = max_connections
+        self._counters = {"requests": 0, "active_requests": 0, "failed_requests": 0}
+        self._counters_lock = threading.Lock()
+
+        async def create_client():
+            return httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                                    keepalive_expiry=keepalive_seconds),
+                # Reads wait on the model (a long prompt can take minutes to evaluate
+                # before the first token); everything else should be quick on localhost.
+                timeout=httpx.Timeout(connect=connect_timeout, read=read_timeout, write=30, pool=read_timeout),
+            )
+        self._client = self.run(create_client())
+
+    def run(self, coro):
+        """Runs `coro` on the client's loop and blocks the calling thread for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _count(self, name: str, delta: int = 1):
+        with self._counters_lock:
+            self._counters[name] += delta
+
+    async def post_json(self, url: str, payload: dict) -> dict:
+        self._count("requests")
+        self._count("active_requests")
+        try:
+            response = await self._client.post(url, json=payload)
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            self._count("failed_requests")
+            raise
+        finally:
+            self._count("active_requests", -1)
+
+    async def stream_lines(self, url: str, payload: dict):
+        """Yields each non-empty line of a streamed response, decoded as JSON."""
+        self._count("requests")
+        self._count("active_requests")
+        try:
+            async with self._client.stream("POST", url, json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        yield json.loads(line)
+        except Exception:
+            self._count("failed_requests")
+            raise
+        finally:
+            self._count("active_requests", -1)
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            stats = {**self._counters, "max_connections": self.max_connections}
+        # httpx doesn't expose its pool; read it from the httpcore transport when available.
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        stats["open_connections"] = len(connections)
+        stats["idle_connections"] = sum(1 for connection in connections if connection.is_idle())
+        return stats
+
+    def close(self):
+        """Closes the pooled connections and stops the loop thread; called on app shutdown."""
+        self.run(self._client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
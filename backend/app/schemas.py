@@ -11,8 +11,61 @@ class Keyword(BaseModel):
 class SearchQuery(BaseModel):
     query: str
 
+class SearchHit(BaseModel):
+    text: str
+    start: Optional[float] = None  # Seconds from the start of the recording
+    end: Optional[float] = None
+
 class SearchResult(BaseModel):
     answer: str
+    sources: List[SearchHit] = []
+
+# --- Schemas for Timestamped Transcripts ---
+# Stored column-wise: entry i of every list describes segment (or word) i.
+class TranscriptWords(BaseModel):
+    start: List[float]
+    end: List[float]
+    word: List[str]
+    segment: List[int]  # Index of the segment each word belongs to
+
+class TranscriptSegments(BaseModel):
+    start: List[float]
+    end: List[float]
+    text: List[str]
+    words: Optional[TranscriptWords] = None
+    speaker: Optional[List[Optional[str]]] = None  # Diarized speaker of each segment
+
+class SpeakerTurn(BaseModel):
+    start: float
+    end: float
+    speaker: str
+
+# --- Schema for Transcription Scheduler ---
+class TranscriptionStats(BaseModel):
+    queue_depth: int
+    in_flight: int
+    max_in_flight: int
+    active_jobs: int
+    resident_models: List[str] = []
+    chunk_overhead_seconds: float  # Fitted for the default Whisper model
+    chunk_rtf: float  # Fitted for the default Whisper model
+    straggler_work_items: int
+    straggler_redecoded: int
+    straggler_redecode_wins: int
+
+# --- Schema for the shared Ollama HTTP client ---
+class OllamaStats(BaseModel):
+    """
+    Request counters and connection pool usage of the shared Ollama client. The
+    connection counts are read from httpx internals and are 0 when the installed
+    httpx doesn't expose its pool.
+    """
+    requests: int
+    active_requests: int
+    failed_requests: int
+    max_connections: int
+    open_connections: int  # 0 if the pool can't be inspected
+    idle_connections: int  # 0 if the pool can't be inspected
 
 # --- Schemas for Meeting Insights ---
 class ActionItem(BaseModel):
@@ -28,8 +81,16 @@ class MeetingBase(BaseModel):
 class MeetingStatus(MeetingBase):
     pass
 
-# The main Meeting schema returned by the API
-class Meeting(MeetingBase):
+def _parse_json_list(v):
+    if isinstance(v, str):
+        try:
+            return json.loads(v)
+        except json.JSONDecodeError:
+            return []
+    return v if v is not None else []
+
+# Returned by GET /meetings, which the frontend polls; leaves out the bulky segments and speaker turns
+class MeetingListItem(MeetingBase):
     transcript: Optional[str] = None
     summary: Optional[str] = None
     action_items: List[ActionItem] = []
@@ -37,17 +98,39 @@ class Meeting(MeetingBase):
     keywords: List[Keyword] = []
     participants: List[str] = []
     sentiment: Optional[str] = None
+    preview_transcript: Optional[str] = None
+    insights_quality: Optional[str] = None  # "preview", "partial" while streaming, then "final"
+    language: Optional[str] = None
+    duplicate_of: Optional[int] = None  # Set when results were reused from an earlier upload of the same audio
 
     # Pydantic v2 validator
     @field_validator('action_items', 'decisions', 'keywords', 'participants', mode='before')
     @classmethod
     def parse_json_strings(cls, v):
+        return _parse_json_list(v)
+
+    class Config:
+        from_attributes = True
+
+# The main Meeting schema returned by the API
+class Meeting(MeetingListItem):
+    speakers: List[SpeakerTurn] = []
+    segments: Optional[TranscriptSegments] = None
+
+    @field_validator('speakers', mode='before')
+    @classmethod
+    def parse_speakers(cls, v):
+        return _parse_json_list(v)
+
+    @field_validator('segments', mode='before')
+    @classmethod
+    def parse_segments(cls, v):
         if isinstance(v, str):
             try:
                 return json.loads(v)
             except json.JSONDecodeError:
-                return []
-        return v if v is not None else []
+                return None
+        return v
 
     class Config:
         from_attributes = True
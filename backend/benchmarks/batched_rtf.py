@@ -0,0 +1,55 @@
+"""
+Compares the real-time factor (decode time / audio duration) of per-chunk and
+batched Whisper decoding on CPU with int8 weights.
+
+Run from the backend directory:
+    python -m benchmarks.batched_rtf path/to/meeting.mp3 --model base.en --batch-sizes 4 8 16
+"""
+import argparse
+import time
+
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+from app.ai_processing import _decode_batch, _decode_chunk
+from app.audio import SAMPLE_RATE, PCMDecoder, SpeechChunker
+
+
+def load_chunks(filepath: str, max_chunk_s: float) -> list:
+    chunker = SpeechChunker(max_chunk_s=max_chunk_s)
+    blocks = PCMDecoder().stream(filepath, block_seconds=max_chunk_s)
+    return [chunk for _offset, chunk in chunker.chunks(blocks)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", help="Any audio/video file ffmpeg can decode")
+    parser.add_argument("--model", default="base.en")
+    parser.add_argument("--cpu-threads", type=int, default=0)
+    parser.add_argument("--max-chunk-seconds", type=float, default=30)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 8, 16])
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.audio, args.max_chunk_seconds)
+    speech_seconds = sum(len(chunk) for chunk in chunks) / SAMPLE_RATE
+    print(f"{len(chunks)} speech chunks, {speech_seconds:.1f}s of speech")
+
+    model = WhisperModel(args.model, device="cpu", compute_type="int8", cpu_threads=args.cpu_threads)
+    pipeline = BatchedInferencePipeline(model=model)
+
+    start = time.perf_counter()
+    for chunk in chunks:
+        _decode_chunk(model, chunk, {})
+    baseline = time.perf_counter() - start
+    print(f"per-chunk       RTF {baseline / speech_seconds:.3f}  ({baseline:.1f}s)")
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(chunks), batch_size):
+            _decode_batch(pipeline, chunks[i:i + batch_size], batch_size, {})
+        elapsed = time.perf_counter() - start
+        print(f"batched x{batch_size:<5}  RTF {elapsed / speech_seconds:.3f}  ({elapsed:.1f}s, "
+              f"{baseline / elapsed:.2f}x vs per-chunk)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Transcription benchmark suite. Generates meeting-like fixtures of several lengths
+and, for each executor mode, measures:
+
+  - decode_seconds:   ffmpeg decode of the whole file to 16 kHz PCM
+  - chunk_seconds:    VAD chunking of the decoded PCM (decode time subtracted)
+  - transcribe_seconds / rtf: TranscriptionService.transcribe wall time, and that
+                      time divided by the audio duration
+  - peak_rss_mb:      peak resident memory of the benchmark process, and of the
+                      largest worker process in "process" mode
+  - chunk_latency:    seconds from a chunk being cut until its transcript is back
+                      (p50 / p90 / p99 / max)
+
+Every (mode, fixture) case runs in a fresh process so peak RSS is its own. Results
+are written as JSON, together with the host, library versions and settings, so
+runs from different releases can be compared.
+
+Run from the backend directory:
+    python -m benchmarks.transcription_suite --lengths 60 600 1800 --modes thread process \\
+        --speech-clip path/to/speech.wav --output benchmarks/results/latest.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import ffmpeg
+import numpy as np
+
+from app.ai_processing import AIServiceConfig, TranscriptionService
+from app.audio import SAMPLE_RATE, PCMDecoder, SpeechChunker
+from app.autotune import synthetic_speech
+
+
+def make_fixture(path: str, seconds: float, speech: np.ndarray, seed: int = 0):
+    """
+    Writes `seconds` of meeting-like audio to `path`: utterances of 3-12 s cut from
+    `speech`, separated by 0.3-2 s pauses of faint room noise. Any extension
+    ffmpeg can encode works; the format changes the decode cost being measured.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * SAMPLE_RATE)
+    parts, length = [], 0
+    while length < total:
+        size = min(int(rng.uniform(3, 12) * SAMPLE_RATE), len(speech))
+        start = int(rng.integers(0, len(speech) - size + 1))
+        pause = int(rng.uniform(0.3, 2.0) * SAMPLE_RATE)
+        parts += [speech[start:start + size], 0.002 * rng.standard_normal(pause).astype(np.float32)]
+        length += size + pause
+    audio = np.concatenate(parts)[:total]
+    samples = (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+
+    wav_path = path if path.endswith(".wav") else f"{path}.wav"
+    with wave.open(wav_path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+    if wav_path != path:
+        ffmpeg.input(wav_path).output(path).global_args("-loglevel", "error").overwrite_output().run()
+        os.remove(wav_path)
+
+
+def fixture_path(directory: str, seconds: float, extension: str, clip: str | None) -> str:
+    source = os.path.splitext(os.path.basename(clip))[0] if clip else "synthetic"
+    return os.path.join(directory, f"{source}_{int(seconds)}s{extension}")
+
+
+def peak_rss_mb() -> dict:
+    # ru_maxrss is in KiB on Linux; for children it is the largest single child, not a sum.
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return {"process": round(own, 1), "largest_worker": round(workers, 1)}
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"p50": round(p50, 3), "p90": round(p90, 3), "p99": round(p99, 3), "max": round(max(values), 3),
+            "count": len(values)}
+
+
+def run_case(fixture: str, duration: float, mode: str, model: str | None, workers: int | None) -> dict:
+    """Runs one (fixture, executor mode) case; meant to be called in a fresh process."""
+    config = AIServiceConfig()
+    config.transcription_executor = mode
+    config.whisper_autotune = False
+    if workers:
+        config.transcription_workers = workers
+    # A private cache directory so every case really runs Whisper.
+    config.transcript_cache_dir = tempfile.mkdtemp(prefix="bench-cache-")
+    service = TranscriptionService(config)
+
+    # Both stages stream as they do in the service, so they don't inflate peak RSS.
+    start = time.perf_counter()
+    for _block in PCMDecoder().stream(fixture, block_seconds=config.vad_max_chunk_seconds):
+        pass
+    decode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunker = SpeechChunker(max_chunk_s=config.vad_max_chunk_seconds, min_silence_ms=config.vad_min_silence_ms,
+                            overlap_s=config.chunk_overlap_seconds)
+    chunk_count, speech_samples = 0, 0
+    for _offset, audio in chunker.chunks(PCMDecoder().stream(fixture, block_seconds=config.vad_max_chunk_seconds)):
+        chunk_count += 1
+        speech_samples += len(audio)
+    chunk_seconds = time.perf_counter() - start - decode_seconds
+
+    # Chunks are cut, and reported done, in index order, so the n-th cut is chunk n.
+    cut_at, latencies = [], []
+
+    def on_audio(_offset, _audio):
+        cut_at.append(time.perf_counter())
+
+    def on_chunk(index, _chunk):
+        latencies.append(time.perf_counter() - cut_at[index])
+
+    start = time.perf_counter()
+    asyncio.run(service.transcribe(fixture, model=model, on_chunk=on_chunk, on_audio=on_audio))
+    transcribe_seconds = time.perf_counter() - start
+    service.executor.shutdown()
+
+    return {
+        "fixture": os.path.basename(fixture),
+        "audio_seconds": duration,
+        "mode": mode,
+        "workers": service.max_workers,
+        "cpu_threads": service.cpu_threads,
+        "compute_type": service.compute_type,
+        "chunks": chunk_count,
+        "speech_seconds": round(speech_samples / SAMPLE_RATE, 1),
+        "decode_seconds": round(decode_seconds, 3),
+        "chunk_seconds": round(chunk_seconds, 3),
+        "transcribe_seconds": round(transcribe_seconds, 3),
+        "rtf": round(transcribe_seconds / duration, 4),
+        "peak_rss_mb": peak_rss_mb(),
+        "chunk_latency": percentiles(latencies),
+    }
+
+
+def environment() -> dict:
+    import ctranslate2
+    import faster_whisper
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "ctranslate2": ctranslate2.__version__,
+        "faster_whisper": faster_whisper.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=float, nargs="+", default=[60, 600, 1800],
+                        help="Fixture lengths in seconds")
+    parser.add_argument("--modes", nargs="+", choices=["thread", "process"], default=["thread", "process"])
+    parser.add_argument("--model", default=None, help="Whisper model (default: WHISPER_MODEL_PATH)")
+    parser.add_argument("--workers", type=int, default=None, help="Override TRANSCRIPTION_WORKERS")
+    parser.add_argument("--speech-clip", default=None,
+                        help="Recording whose speech is cut up into fixtures; generated audio is used without one")
+    parser.add_argument("--format", default=".mp3", help="Fixture file extension, e.g. .mp3, .m4a or .wav")
+    parser.add_argument("--fixtures-dir", default=os.path.join("benchmarks", "fixtures"))
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", f"{time.strftime('%Y%m%d-%H%M%S')}.json"))
+    args = parser.parse_args()
+
+    os.makedirs(args.fixtures_dir, exist_ok=True)
+    speech = None
+    fixtures = []
+    for seconds in args.lengths:
+        path = fixture_path(args.fixtures_dir, seconds, args.format, args.speech_clip)
+        if not os.path.exists(path):
+            if speech is None:
+                speech = (np.concatenate(list(PCMDecoder().stream(args.speech_clip, block_seconds=30)))
+                          if args.speech_clip else synthetic_speech(30))
+            print(f"Generating {path}...")
+            make_fixture(path, seconds, speech)
+        fixtures.append((path, seconds))
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for path, seconds in fixtures:
+        for mode in args.modes:
+            print(f"Running {os.path.basename(path)} with the {mode} executor...")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_case, path, seconds, mode, args.model, args.workers).result()
+            print(f"  RTF {result['rtf']:.3f}, decode {result['decode_seconds']:.1f}s, "
+                  f"chunking {result['chunk_seconds']:.1f}s, peak RSS {result['peak_rss_mb']['process']:.0f} MB, "
+                  f"chunk latency p90 {result['chunk_latency'].get('p90', 0):.1f}s")
+            results.append(result)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "model": args.model, "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()